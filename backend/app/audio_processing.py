@@ -0,0 +1,239 @@
+"""
+Audio post-processing for synthesized speech
+
+Runs on Kokoro's float chunks (one per pipeline segment) before they are
+assembled into a WAV:
+
+    - silence at the start and end of the utterance is trimmed
+    - pauses inside it (including the gaps between segments) are capped
+    - each segment is brought to a common loudness, with a peak limit
+    - the output is resampled to the profile's rate (polyphase filter)
+
+Everything works on NumPy arrays per 10 ms frame or per sample, with Python
+loops only over segments and pauses.
+"""
+from functools import lru_cache
+from math import gcd
+from typing import List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Kokoro's native output rate
+SOURCE_RATE = 24000
+# Analysis frame for silence detection
+FRAME_SECONDS = 0.01
+# Output samples computed per matrix product when resampling
+RESAMPLE_BLOCK = 32768
+
+
+class AudioProfile:
+    def __init__(
+        self,
+        sample_rate: int = SOURCE_RATE,
+        trim_silence: bool = True,
+        max_pause: Optional[float] = 0.4,
+        edge_padding: float = 0.05,
+        silence_threshold_db: float = -45.0,
+        target_rms_db: Optional[float] = -20.0,
+        max_gain_db: float = 12.0,
+        peak_limit: float = 0.97,
+    ):
+        """
+        Args:
+            sample_rate: Output sample rate
+            trim_silence: Trim leading/trailing silence of the utterance
+            max_pause: Longest pause kept inside the utterance, in seconds (None keeps all)
+            edge_padding: Silence kept at each trimmed edge, in seconds
+            silence_threshold_db: Frame RMS (dBFS) below which a frame counts as silence
+            target_rms_db: Loudness (RMS of voiced frames, dBFS) per segment (None disables)
+            max_gain_db: Largest boost/cut applied by loudness normalization
+            peak_limit: Samples are kept below this absolute value after the gain
+        """
+        self.sample_rate = sample_rate
+        self.trim_silence = trim_silence
+        self.max_pause = max_pause
+        self.edge_padding = edge_padding
+        self.silence_threshold_db = silence_threshold_db
+        self.target_rms_db = target_rms_db
+        self.max_gain_db = max_gain_db
+        self.peak_limit = peak_limit
+
+
+AUDIO_PROFILES = {
+    "default": AudioProfile(),
+    "mobile": AudioProfile(sample_rate=16000),
+    "raw": AudioProfile(trim_silence=False, max_pause=None, target_rms_db=None),
+}
+
+
+def _db_to_amplitude(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+def frame_rms(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS of each frame; a trailing partial frame gets its own value"""
+    full = len(audio) // frame
+    rms = np.empty(full + (1 if len(audio) % frame else 0), dtype=np.float32)
+    if full:
+        frames = audio[:full * frame].reshape(full, frame)
+        rms[:full] = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame)
+    if len(rms) > full:
+        tail = audio[full * frame:]
+        rms[full] = np.sqrt(np.dot(tail, tail) / len(tail))
+    return rms
+
+
+def _silent_runs(silent: np.ndarray) -> List[Tuple[int, int]]:
+    """(start, end) frame index pairs of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+
+def trim_pauses(chunks: List[np.ndarray], profile: AudioProfile, sample_rate: int = SOURCE_RATE) -> List[np.ndarray]:
+    """
+    Trim edge silence and cap internal pauses across all chunks
+
+    Silence is decided per frame on the whole utterance, so a pause made of
+    one segment's tail and the next one's head is capped as a single pause.
+    """
+    if not chunks or (not profile.trim_silence and profile.max_pause is None):
+        return chunks
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    threshold = _db_to_amplitude(profile.silence_threshold_db)
+
+    rms = [frame_rms(chunk, frame) for chunk in chunks]
+    silent = np.concatenate(rms) < threshold
+    if silent.all():
+        return chunks
+
+    keep = np.ones(len(silent), dtype=bool)
+    pad = int(round(profile.edge_padding / FRAME_SECONDS))
+    cap = int(round(profile.max_pause / FRAME_SECONDS)) if profile.max_pause is not None else None
+    for start, end in _silent_runs(silent):
+        if start == 0:
+            if profile.trim_silence:
+                keep[start:max(start, end - pad)] = False
+        elif end == len(silent):
+            if profile.trim_silence:
+                keep[start + pad:end] = False
+        elif cap is not None and end - start > cap:
+            # Keep the edges of the pause so the speech on both sides does not get clipped
+            head = cap // 2
+            keep[start + head:end - (cap - head)] = False
+
+    trimmed = []
+    offset = 0
+    for chunk, chunk_rms in zip(chunks, rms):
+        chunk_keep = keep[offset:offset + len(chunk_rms)]
+        offset += len(chunk_rms)
+        if chunk_keep.all():
+            trimmed.append(chunk)
+        elif chunk_keep.any():
+            trimmed.append(chunk[np.repeat(chunk_keep, frame)[:len(chunk)]])
+    return trimmed
+
+
+def normalize_loudness(chunks: List[np.ndarray], profile: AudioProfile, sample_rate: int = SOURCE_RATE) -> List[np.ndarray]:
+    """Scale each chunk so its voiced frames reach the target RMS, within the gain and peak limits"""
+    if profile.target_rms_db is None:
+        return chunks
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    threshold = _db_to_amplitude(profile.silence_threshold_db)
+    target = _db_to_amplitude(profile.target_rms_db)
+    max_gain = _db_to_amplitude(profile.max_gain_db)
+
+    normalized = []
+    for chunk in chunks:
+        rms = frame_rms(chunk, frame)
+        voiced = rms[rms >= threshold]
+        if len(chunk) == 0 or len(voiced) == 0:
+            normalized.append(chunk)
+            continue
+        level = float(np.sqrt(np.mean(voiced ** 2)))
+        gain = min(max(target / level, 1 / max_gain), max_gain)
+        peak = float(np.max(np.abs(chunk)))
+        if peak * gain > profile.peak_limit:
+            gain = profile.peak_limit / peak
+        normalized.append(chunk * np.float32(gain) if gain != 1.0 else chunk)
+    return normalized
+
+
+@lru_cache(maxsize=16)
+def polyphase_filter(up: int, down: int, half_width: int = 10, beta: float = 5.0) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass for resampling by up/down (at the upsampled rate)"""
+    max_rate = max(up, down)
+    cutoff = 1.0 / max_rate
+    taps = 2 * half_width * max_rate + 1
+    t = np.arange(taps) - (taps - 1) / 2
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(taps, beta)
+    # Upsampling by zero-stuffing divides the level by up
+    return (h * up).astype(np.float32)
+
+
+def resample_poly(audio: np.ndarray, up: int, down: int) -> np.ndarray:
+    """
+    Resample by the rational factor up/down with a polyphase FIR filter
+
+    Equivalent to zero-stuffing by up, low-pass filtering and keeping every
+    down-th sample, but no zero-stuffed signal is ever built: each output
+    sample is one dot product of a filter phase with a strided window over
+    the original samples, and only the outputs actually kept are computed.
+    """
+    divisor = gcd(up, down)
+    up, down = up // divisor, down // divisor
+    audio = np.asarray(audio, dtype=np.float32)
+    if up == down or len(audio) == 0:
+        return audio
+
+    h = polyphase_filter(up, down)
+    delay = (len(h) - 1) // 2
+    num_out = -(-len(audio) * up // down)
+    # Output sample m is upsampled sample m * down, shifted by the filter delay
+    index = np.arange(num_out) * down + delay
+    phase = index % up
+    base = index // up
+
+    out = np.zeros(num_out, dtype=np.float32)
+    for p in range(up):
+        taps = h[p::up][::-1].copy()
+        padded = np.concatenate((np.zeros(len(taps) - 1, np.float32), audio, np.zeros(len(taps), np.float32)))
+        windows = sliding_window_view(padded, len(taps))
+        selected = np.flatnonzero(phase == p)
+        positions = base[selected]
+        valid = positions < len(windows)
+        selected, positions = selected[valid], positions[valid]
+        # Blocks bound the gathered window copy to a few MB on long replies
+        for start in range(0, len(selected), RESAMPLE_BLOCK):
+            block = slice(start, start + RESAMPLE_BLOCK)
+            out[selected[block]] = windows[positions[block]] @ taps
+    return out
+
+
+def resample(audio: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    return resample_poly(audio, to_rate, from_rate)
+
+
+def postprocess_chunks(
+    chunks,
+    profile: AudioProfile,
+    sample_rate: Optional[int] = None,
+) -> Tuple[List[np.ndarray], int]:
+    """
+    Apply a profile to Kokoro's float chunks
+
+    Args:
+        chunks: Float audio chunks at SOURCE_RATE
+        profile: Processing settings
+        sample_rate: Output rate override (the lower of it and the profile's rate wins)
+
+    Returns:
+        Tuple of (processed chunks, output sample rate)
+    """
+    chunks = [np.asarray(chunk, dtype=np.float32) for chunk in chunks]
+    chunks = trim_pauses(chunks, profile)
+    chunks = normalize_loudness(chunks, profile)
+    rate = profile.sample_rate if sample_rate is None else min(sample_rate, profile.sample_rate)
+    if rate != SOURCE_RATE:
+        chunks = [resample(chunk, SOURCE_RATE, rate) for chunk in chunks]
+    return chunks, rate
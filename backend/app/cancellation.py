@@ -0,0 +1,131 @@
+"""
+Per-session turn tracking and cancellation
+
+A "turn" is the LLM + TTS work done for one chat message. Turns are cancelled
+when the client disconnects, when the session is interrupted explicitly, or
+when a new message for the same session supersedes the one in flight.
+"""
+import asyncio
+import threading
+import logging
+from typing import Awaitable, Optional, TypeVar
+from fastapi import Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds between client disconnect checks while a turn is running
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class TurnCancelled(Exception):
+    """Raised when a turn was cancelled (reason is the cancellation cause)"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Turn cancelled: {reason}")
+        self.reason = reason
+
+
+class Turn:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # Thread-safe flag checked by TTS between synthesis segments
+        self.cancel_event = threading.Event()
+        self.reason: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+
+class TurnRegistry:
+    def __init__(self):
+        self._turns: dict[str, Turn] = {}
+        self.started = 0
+        self.completed = 0
+        self.cancellations = {"disconnect": 0, "interrupt": 0, "superseded": 0}
+
+    def start(self, session_id: str) -> Turn:
+        """Register a new turn for the session, superseding any turn still running"""
+        previous = self._turns.get(session_id)
+        if previous is not None:
+            self.cancel(previous, "superseded")
+        turn = Turn(session_id)
+        self._turns[session_id] = turn
+        self.started += 1
+        return turn
+
+    def finish(self, turn: Turn):
+        """Unregister a turn once its work is over"""
+        if self._turns.get(turn.session_id) is turn:
+            del self._turns[turn.session_id]
+        if not turn.cancelled:
+            self.completed += 1
+
+    def cancel(self, turn: Turn, reason: str):
+        """Cancel a turn's running step and signal its TTS job to stop"""
+        if turn.cancelled:
+            return
+        turn.reason = reason
+        turn.cancel_event.set()
+        self.cancellations[reason] = self.cancellations.get(reason, 0) + 1
+        if turn.task is not None and not turn.task.done():
+            turn.task.cancel()
+        logger.info("Cancelled turn for session %s (%s)", turn.session_id, reason)
+
+    def interrupt(self, session_id: str) -> bool:
+        """Cancel the session's in-flight turn; returns False if there was none"""
+        turn = self._turns.get(session_id)
+        if turn is None:
+            return False
+        self.cancel(turn, "interrupt")
+        return True
+
+    async def run(self, turn: Turn, awaitable: Awaitable[T], request: Optional[Request] = None) -> T:
+        """
+        Run one step of a turn (LLM call, TTS job) as a cancellable task.
+        When a request is given, the client connection is watched and the step is
+        cancelled as soon as the client disconnects.
+
+        Raises:
+            TurnCancelled: if the turn was cancelled before or during the step
+        """
+        if turn.cancelled:
+            raise TurnCancelled(turn.reason)
+
+        task = asyncio.ensure_future(awaitable)
+        turn.task = task
+        watcher = asyncio.create_task(self._watch_disconnect(turn, request)) if request is not None else None
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if turn.cancelled and not (current and current.cancelling()):
+                raise TurnCancelled(turn.reason)
+            # The caller itself is being cancelled (e.g. the server dropped the response)
+            self.cancel(turn, "disconnect")
+            raise
+        finally:
+            turn.task = None
+            if watcher is not None:
+                watcher.cancel()
+
+    async def _watch_disconnect(self, turn: Turn, request: Request):
+        while not turn.cancelled:
+            if await request.is_disconnected():
+                self.cancel(turn, "disconnect")
+                return
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._turns),
+            "started": self.started,
+            "completed": self.completed,
+            "cancelled": dict(self.cancellations),
+        }
+
+
+turn_registry = TurnRegistry()
@@ -3,14 +3,15 @@ Database setup and initialization for SQLite
 """
 import aiosqlite
 import logging
+import os
 from pathlib import Path
 from datetime import datetime
 from app.persona import SYSTEM_PROMPT, INITIAL_MESSAGE
 
 logger = logging.getLogger(__name__)
 
-# Database path relative to backend directory
-DB_PATH = Path(__file__).parent.parent / "personas.db"
+# Database path relative to backend directory (PERSONAS_DB_PATH overrides it, e.g. for benchmarks)
+DB_PATH = Path(os.getenv("PERSONAS_DB_PATH") or Path(__file__).parent.parent / "personas.db")
 
 async def init_db():
     """Initialize database and create tables"""
@@ -23,12 +24,39 @@ async def init_db():
                 system_prompt TEXT NOT NULL,
                 initial_message TEXT NOT NULL,
                 language TEXT NOT NULL DEFAULT 'pt-BR',
+                model TEXT,
+                num_predict INTEGER,
+                num_ctx INTEGER,
+                temperature REAL,
+                stop TEXT,
                 created_at TEXT NOT NULL,
                 updated_at TEXT NOT NULL
             )
         """)
         await db.commit()
 
+        await migrate_personas(db)
+
+        await init_search_index(db)
+
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                persona_id INTEGER,
+                role TEXT NOT NULL,
+                text TEXT NOT NULL,
+                llm_ms REAL,
+                tts_ms REAL,
+                audio_duration REAL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcripts_session ON transcripts (session_id, id)"
+        )
+        await db.commit()
+
         # Check if Carlos Silva persona exists
         cursor = await db.execute("SELECT COUNT(*) FROM personas WHERE name = ?", ("Carlos Silva",))
         count = (await cursor.fetchone())[0]
@@ -51,6 +79,75 @@ async def init_db():
             await db.commit()
             logger.info("Default persona 'Carlos Silva' seeded successfully")
 
+# Columns added after the first release: (name, SQL type)
+PERSONA_MIGRATIONS = [
+    ("model", "TEXT"),
+    ("num_predict", "INTEGER"),
+    ("num_ctx", "INTEGER"),
+    ("temperature", "REAL"),
+    ("stop", "TEXT"),
+]
+
+
+async def migrate_personas(db: aiosqlite.Connection):
+    """Add missing persona columns to databases created by older versions"""
+    cursor = await db.execute("PRAGMA table_info(personas)")
+    existing = {row[1] for row in await cursor.fetchall()}
+    for column, column_type in PERSONA_MIGRATIONS:
+        if column not in existing:
+            await db.execute(f"ALTER TABLE personas ADD COLUMN {column} {column_type}")
+            logger.info("Added column personas.%s", column)
+    await db.commit()
+
+
+async def init_search_index(db: aiosqlite.Connection):
+    """
+    Create the FTS5 index over personas (external content table) and the
+    triggers that keep it in sync. The index is rebuilt when first created
+    so personas that existed before it are searchable.
+    """
+    cursor = await db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'personas_fts'"
+    )
+    index_exists = await cursor.fetchone() is not None
+
+    await db.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS personas_fts USING fts5(
+            name,
+            description,
+            system_prompt,
+            content='personas',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS personas_fts_ai AFTER INSERT ON personas BEGIN
+            INSERT INTO personas_fts(rowid, name, description, system_prompt)
+            VALUES (new.id, new.name, new.description, new.system_prompt);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS personas_fts_ad AFTER DELETE ON personas BEGIN
+            INSERT INTO personas_fts(personas_fts, rowid, name, description, system_prompt)
+            VALUES ('delete', old.id, old.name, old.description, old.system_prompt);
+        END
+    """)
+    await db.execute("""
+        CREATE TRIGGER IF NOT EXISTS personas_fts_au AFTER UPDATE ON personas BEGIN
+            INSERT INTO personas_fts(personas_fts, rowid, name, description, system_prompt)
+            VALUES ('delete', old.id, old.name, old.description, old.system_prompt);
+            INSERT INTO personas_fts(rowid, name, description, system_prompt)
+            VALUES (new.id, new.name, new.description, new.system_prompt);
+        END
+    """)
+
+    if not index_exists:
+        await db.execute("INSERT INTO personas_fts(personas_fts) VALUES ('rebuild')")
+        logger.info("Persona search index built")
+    await db.commit()
+
+
 async def get_db():
     """Get database connection"""
     async with aiosqlite.connect(DB_PATH) as db:
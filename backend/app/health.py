@@ -0,0 +1,151 @@
+"""
+Background dependency monitor
+
+Periodically probes the LLM server and the TTS engine and caches the results, so
+/health and /ready answer instantly without any outbound I/O per poll.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+import httpx
+from app.llm import ChatBackend
+
+logger = logging.getLogger(__name__)
+
+
+def model_in_list(model: str, available_models: list[str]) -> bool:
+    """Check if model matches one of the server's model names (with or without tag / :latest)"""
+    for available_model in available_models:
+        if available_model == model or available_model.startswith(f"{model}:"):
+            return True
+        if model == available_model.replace(":latest", "") or available_model == f"{model}:latest":
+            return True
+    return False
+
+
+class DependencyMonitor:
+    def __init__(self, llm_client: ChatBackend, tts_client=None, interval: float = 15.0, timeout: float = 5.0):
+        """
+        Args:
+            llm_client: Chat backend used to list the server's models
+                (its model is the one that must be available)
+            tts_client: KokoroTTS instance to probe
+            interval: Seconds between probes
+            timeout: Per-probe timeout in seconds
+        """
+        self.llm_client = llm_client
+        self.tts_client = tts_client
+        self.interval = interval
+        self.timeout = timeout
+        self.status: dict[str, dict] = {
+            "llm": {"ok": False, "detail": "not checked yet"},
+            "tts": {"ok": False, "detail": "not checked yet"},
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-probe")
+
+    async def probe_llm(self) -> dict:
+        start = time.perf_counter()
+        model = self.llm_client.model
+        try:
+            models = await asyncio.wait_for(self.llm_client.list_models(), timeout=self.timeout)
+            latency_ms = (time.perf_counter() - start) * 1000
+            model_ok = model_in_list(model, models)
+            return {
+                "ok": model_ok,
+                "latency_ms": round(latency_ms, 1),
+                "backend": self.llm_client.label,
+                "model": model,
+                "model_available": model_ok,
+                "detail": None if model_ok else f"Model '{model}' not found",
+            }
+        except (httpx.HTTPError, ValueError, asyncio.TimeoutError) as e:
+            return {
+                "ok": False,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                "backend": self.llm_client.label,
+                "detail": f"{self.llm_client.label} unreachable: {e!r}",
+            }
+
+    async def probe_tts(self) -> dict:
+        if self.tts_client is None:
+            return {"ok": False, "detail": "TTS not configured"}
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            # On the monitor's own thread: a synthesis executor full of jobs
+            # means TTS is busy, not down, and must not fail /ready
+            await asyncio.wait_for(
+                loop.run_in_executor(self._probe_executor, self.tts_client.pipeline.load_voice, self.tts_client.voice),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            return {"ok": False, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "detail": "TTS probe timed out"}
+        except Exception as e:
+            return {"ok": False, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "detail": f"TTS error: {e}"}
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        queue_wait_ms = await self.executor_wait()
+        return {
+            "ok": True,
+            "latency_ms": latency_ms,
+            "queue_wait_ms": queue_wait_ms,
+            "detail": None if queue_wait_ms < self.timeout * 1000 else "TTS busy: jobs wait for a worker thread",
+        }
+
+    async def executor_wait(self) -> float:
+        """Milliseconds a job currently waits for a thread of the shared (synthesis) executor, capped at the timeout"""
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        try:
+            started = await asyncio.wait_for(loop.run_in_executor(None, time.perf_counter), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return round(self.timeout * 1000, 1)
+        return round((started - submitted) * 1000, 1)
+
+    async def check(self):
+        """Probe all dependencies once and update the cached status"""
+        llm, tts = await asyncio.gather(self.probe_llm(), self.probe_tts())
+        checked_at = datetime.utcnow().isoformat()
+        for name, result in (("llm", llm), ("tts", tts)):
+            previous = self.status.get(name, {})
+            if previous.get("ok") != result["ok"] and "checked_at" in previous:
+                log = logger.info if result["ok"] else logger.warning
+                log("Dependency %s is now %s", name, "up" if result["ok"] else f"down ({result['detail']})")
+            result["checked_at"] = checked_at
+            self.status[name] = result
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._probe_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("Error checking dependencies: %s", e)
+            await asyncio.sleep(self.interval)
+
+    @property
+    def ready(self) -> bool:
+        return all(dep.get("ok") for dep in self.status.values())
+
+    def snapshot(self) -> dict:
+        return {
+            "status": "ok" if self.ready else "degraded",
+            "dependencies": self.status,
+        }
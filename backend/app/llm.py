@@ -1,58 +1,225 @@
 """
-Ollama LLM integration for conversation (async version)
+LLM integration for conversation (async version)
+
+The session code only talks to ChatBackend; OllamaClient and
+OpenAIChatClient (any server exposing an OpenAI-style
+/v1/chat/completions, e.g. one doing continuous batching) implement it and
+are picked by name with get_backend_class().
 """
-import httpx
+import json
+from abc import ABC, abstractmethod
 from typing import Optional
+import httpx
+
+
+class ChatBackend(ABC):
+    """Conversation state plus one request per turn to an LLM server"""
 
+    # Human-readable server name used in error messages and startup checks
+    label = "LLM"
+    # Endpoint listing the models the server can serve
+    models_path = ""
 
-class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "qwen2.5:1.5b", system_prompt: Optional[str] = None):
-        self.base_url = base_url
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        system_prompt: Optional[str] = None,
+        options: Optional[dict] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 60,
+    ):
+        self.base_url = base_url.rstrip("/")
         self.model = model
         self.system_prompt = system_prompt
+        # Inference options in Ollama terms (num_predict, num_ctx, temperature, stop, ...);
+        # each backend translates them to its own request format
+        self.options = options or {}
+        self.api_key = api_key
+        self.timeout = timeout
         self.conversation_history = []
         self.is_first_message = True
 
-    async def chat(self, user_message: str) -> str:
-        """
-        Send message to Ollama and get response (async, non-blocking)
-        """
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def build_messages(self, user_message: str) -> list[dict]:
         # Add system prompt only on first message
         if self.is_first_message:
             messages = []
             if self.system_prompt:
                 messages.append({"role": "system", "content": self.system_prompt})
             messages.append({"role": "user", "content": user_message})
-            self.is_first_message = False
-        else:
-            messages = self.conversation_history + [{"role": "user", "content": user_message}]
+            return messages
+        return self.conversation_history + [{"role": "user", "content": user_message}]
+
+    async def chat(self, user_message: str, options: Optional[dict] = None) -> str:
+        """
+        Send message to the LLM server and get response (async, non-blocking)
 
+        Args:
+            user_message: The user's message
+            options: Inference options for this request only (defaults to self.options)
+        """
+        messages = self.build_messages(user_message)
+        options = self.options if options is None else options
         try:
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(
-                    f"{self.base_url}/api/chat",
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "stream": False
-                    }
-                )
-                response.raise_for_status()
-
-            result = response.json()
-            assistant_message = result.get("message", {}).get("content", "")
-
-            # Update conversation history
-            self.conversation_history.append({"role": "user", "content": user_message})
-            self.conversation_history.append({"role": "assistant", "content": assistant_message})
-
-            return assistant_message
+            async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+                assistant_message = await self.complete(client, messages, options)
         except httpx.HTTPStatusError as e:
-            raise Exception(f"Error communicating with Ollama: HTTP {e.response.status_code}")
+            raise Exception(f"Error communicating with {self.label}: HTTP {e.response.status_code}")
         except httpx.RequestError as e:
-            raise Exception(f"Error communicating with Ollama: {str(e)}")
+            raise Exception(f"Error communicating with {self.label}: {str(e)}")
+        except ValueError as e:
+            raise Exception(f"Invalid response from {self.label}: {str(e)}")
+
+        # Update conversation history (only for completed requests, so a
+        # cancelled turn leaves the conversation untouched)
+        self.is_first_message = False
+        self.conversation_history.append({"role": "user", "content": user_message})
+        self.conversation_history.append({"role": "assistant", "content": assistant_message})
+
+        return assistant_message
+
+    async def prefill(self, messages: list[dict]):
+        """
+        Have the server process messages without keeping a reply, to warm its prompt cache
+
+        Used ahead of a turn with build_messages(draft), so the real request
+        shares the prompt prefix. The same options are sent (a different
+        num_ctx would make Ollama reload the model), with generation limited
+        to one token: servers disagree on whether a limit of 0 means none.
+        """
+        options = {**self.options, "num_predict": 1}
+        async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+            await self.complete(client, messages, options)
+
+    @abstractmethod
+    async def complete(self, client: httpx.AsyncClient, messages: list[dict], options: dict) -> str:
+        """Run one chat completion for messages and return the assistant text"""
+
+    @staticmethod
+    @abstractmethod
+    def parse_models(data: dict) -> list[str]:
+        """Extract model names from the models_path response"""
+
+    async def list_models(self) -> list[str]:
+        async with httpx.AsyncClient(timeout=self.timeout, headers=self.headers) as client:
+            response = await client.get(f"{self.base_url}{self.models_path}")
+            response.raise_for_status()
+        return self.parse_models(response.json())
 
     def reset(self):
         """Reset conversation history"""
         self.conversation_history = []
         self.is_first_message = True
+
+
+class OllamaClient(ChatBackend):
+    label = "Ollama"
+    models_path = "/api/tags"
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "qwen2.5:1.5b",
+        system_prompt: Optional[str] = None,
+        options: Optional[dict] = None,
+        **kwargs,
+    ):
+        super().__init__(base_url, model, system_prompt, options, **kwargs)
+
+    async def complete(self, client: httpx.AsyncClient, messages: list[dict], options: dict) -> str:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False
+        }
+        if options:
+            payload["options"] = options
+        response = await client.post(f"{self.base_url}/api/chat", json=payload)
+        response.raise_for_status()
+        return response.json().get("message", {}).get("content", "")
+
+    @staticmethod
+    def parse_models(data: dict) -> list[str]:
+        return [m.get("name", "") for m in data.get("models", [])]
+
+
+class OpenAIChatClient(ChatBackend):
+    """
+    Client for OpenAI-compatible servers (vLLM, llama.cpp server, LM Studio, ...)
+
+    Responses are streamed over SSE, so cancelling a turn closes the
+    connection and the server stops generating for it right away.
+    """
+    label = "OpenAI-compatible server"
+    models_path = "/v1/models"
+
+    # Ollama option name -> /v1/chat/completions parameter; num_ctx has no
+    # per-request equivalent (the context size is fixed when the server starts)
+    OPTION_NAMES = {
+        "num_predict": "max_tokens",
+        "temperature": "temperature",
+        "top_p": "top_p",
+        "seed": "seed",
+        "stop": "stop",
+    }
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        model: str = "gemma3:1b",
+        system_prompt: Optional[str] = None,
+        options: Optional[dict] = None,
+        **kwargs,
+    ):
+        super().__init__(base_url, model, system_prompt, options, **kwargs)
+
+    def request_options(self, options: dict) -> dict:
+        return {
+            self.OPTION_NAMES[name]: value
+            for name, value in options.items()
+            if name in self.OPTION_NAMES
+        }
+
+    async def complete(self, client: httpx.AsyncClient, messages: list[dict], options: dict) -> str:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            **self.request_options(options),
+        }
+        parts = []
+        async with client.stream("POST", f"{self.base_url}/v1/chat/completions", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                for choice in chunk.get("choices", []):
+                    content = choice.get("delta", {}).get("content")
+                    if content:
+                        parts.append(content)
+        return "".join(parts)
+
+    @staticmethod
+    def parse_models(data: dict) -> list[str]:
+        return [m.get("id", "") for m in data.get("data", [])]
+
+
+CHAT_BACKENDS: dict[str, type[ChatBackend]] = {
+    "ollama": OllamaClient,
+    "openai": OpenAIChatClient,
+}
+
+
+def get_backend_class(name: str) -> type[ChatBackend]:
+    try:
+        return CHAT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown LLM backend '{name}' (expected one of: {', '.join(CHAT_BACKENDS)})")
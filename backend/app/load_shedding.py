@@ -0,0 +1,231 @@
+"""
+Adaptive load shedding for chat turns
+
+When the CPU is saturated every turn still runs full Kokoro synthesis, so
+everyone's latency goes up together. The controller watches the number of
+TTS jobs in flight and the recent real-time factor (synthesis time / audio
+duration) and steps through cheaper modes as load rises:
+
+    full             normal turn
+    low_sample_rate  audio downsampled (smaller WAV/base64 to build and send)
+    short_replies    + num_predict capped, so replies (and their audio) are shorter
+    text_first       + the reply text is returned right away, audio is fetched later
+    text_only        + no audio at all
+
+Each mode includes the degradations of the ones above it. Load going up
+switches to the matching mode immediately; going down steps back one mode
+at a time after a cooldown, so the mode does not flap around a threshold.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ("full", "low_sample_rate", "short_replies", "text_first", "text_only")
+
+
+def parse_steps(value: str, cast=float) -> Tuple:
+    """Parse a comma separated threshold list, e.g. "2,4,6,8" """
+    return tuple(cast(step) for step in value.split(",") if step.strip())
+
+
+class LoadShedController:
+    def __init__(
+        self,
+        queue_steps: Sequence[int] = (2, 4, 6, 8),
+        rtf_steps: Sequence[float] = (0.6, 0.9, 1.2, 1.6),
+        rtf_window: float = 30.0,
+        cooldown: float = 10.0,
+        reduced_sample_rate: int = 12000,
+        max_num_predict: int = 80,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            queue_steps: TTS jobs in flight at which each degraded mode starts
+            rtf_steps: Recent real-time factor at which each degraded mode starts
+            rtf_window: Seconds of synthesis history used for the recent RTF
+            cooldown: Seconds a mode is held before stepping back down
+            reduced_sample_rate: Output rate from low_sample_rate on
+            max_num_predict: Reply token cap from short_replies on
+            enabled: When False the mode is always "full"
+        """
+        if len(queue_steps) != len(MODES) - 1 or len(rtf_steps) != len(MODES) - 1:
+            raise ValueError(f"Expected {len(MODES) - 1} queue and RTF steps")
+        self.queue_steps = tuple(queue_steps)
+        self.rtf_steps = tuple(rtf_steps)
+        self.rtf_window = rtf_window
+        self.cooldown = cooldown
+        self.reduced_sample_rate = reduced_sample_rate
+        self.max_num_predict = max_num_predict
+        self.enabled = enabled
+
+        self.level = 0
+        self.in_flight = 0
+        self._changed_at = time.monotonic()
+        self._rtf_samples: deque = deque(maxlen=64)
+        self.mode_changes = 0
+        self.turns = {mode: 0 for mode in MODES}
+
+    @property
+    def mode(self) -> str:
+        return MODES[self.level]
+
+    @contextmanager
+    def track_tts(self):
+        """Count a TTS job as in flight for as long as the block runs"""
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def record_tts(self, elapsed: float, audio_duration: float):
+        """Record one finished synthesis (both in seconds)"""
+        if audio_duration > 0:
+            self._rtf_samples.append((time.monotonic(), elapsed / audio_duration))
+
+    def recent_rtf(self) -> Optional[float]:
+        """Mean real-time factor over the last rtf_window seconds (None without samples)"""
+        cutoff = time.monotonic() - self.rtf_window
+        recent = [rtf for at, rtf in self._rtf_samples if at >= cutoff]
+        return sum(recent) / len(recent) if recent else None
+
+    def target_level(self) -> int:
+        queue_level = sum(1 for step in self.queue_steps if self.in_flight >= step)
+        # A slow RTF only counts while other TTS jobs are competing for the CPU;
+        # degrading a lone session on a slow machine would not speed anyone up
+        rtf = self.recent_rtf() if self.in_flight else None
+        rtf_level = sum(1 for step in self.rtf_steps if rtf is not None and rtf >= step)
+        return max(queue_level, rtf_level)
+
+    def update(self) -> str:
+        """Re-evaluate the load and return the mode to use for a new turn"""
+        if not self.enabled:
+            return self.mode
+        target = self.target_level()
+        now = time.monotonic()
+        if target > self.level:
+            new_level = target
+        elif target < self.level and now - self._changed_at >= self.cooldown:
+            new_level = self.level - 1
+        else:
+            new_level = self.level
+        if new_level != self.level:
+            log = logger.warning if new_level > self.level else logger.info
+            log(
+                "Load shedding mode %s -> %s (tts in flight: %d, recent rtf: %s)",
+                self.mode, MODES[new_level], self.in_flight, self.recent_rtf(),
+            )
+            self.level = new_level
+            self._changed_at = now
+            self.mode_changes += 1
+        self.turns[self.mode] += 1
+        return self.mode
+
+    @staticmethod
+    def at_least(mode: str, threshold: str) -> bool:
+        return MODES.index(mode) >= MODES.index(threshold)
+
+    def sample_rate(self, mode: str) -> Optional[int]:
+        """Output rate cap for a turn (None leaves the audio profile's rate)"""
+        return self.reduced_sample_rate if self.at_least(mode, "low_sample_rate") else None
+
+    def limit_options(self, options: dict, mode: str) -> dict:
+        """Inference options for a turn, with num_predict capped in short_replies and above"""
+        if not self.at_least(mode, "short_replies"):
+            return options
+        num_predict = options.get("num_predict")
+        if num_predict is not None and 0 < num_predict <= self.max_num_predict:
+            return options
+        return {**options, "num_predict": self.max_num_predict}
+
+    def stats(self) -> dict:
+        rtf = self.recent_rtf()
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "tts_in_flight": self.in_flight,
+            "recent_rtf": round(rtf, 3) if rtf is not None else None,
+            "mode_changes": self.mode_changes,
+            "turns_by_mode": dict(self.turns),
+        }
+
+
+class DeferredAudio:
+    """
+    Audio synthesized after the reply text was already returned (text_first mode)
+
+    Jobs are keyed by a random id the client polls with; finished jobs are
+    dropped ttl seconds after they were submitted.
+    """
+
+    def __init__(self, ttl: float = 120.0):
+        self.ttl = ttl
+        self._jobs: dict[str, dict] = {}
+
+    def submit(self, session_id: str, synthesize: Callable[[threading.Event], Awaitable]) -> str:
+        """Start synthesize(cancel_event) in the background and return the job id"""
+        self._purge()
+        audio_id = uuid.uuid4().hex
+        cancel_event = threading.Event()
+        self._jobs[audio_id] = {
+            "session_id": session_id,
+            "cancel_event": cancel_event,
+            "task": asyncio.create_task(synthesize(cancel_event)),
+            "submitted_at": time.monotonic(),
+        }
+        return audio_id
+
+    async def result(self, audio_id: str, timeout: float):
+        """
+        Wait up to timeout seconds for a job's result
+
+        Raises:
+            KeyError: unknown or expired id
+            asyncio.TimeoutError: still synthesizing
+        """
+        task = self._jobs[audio_id]["task"]
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.CancelledError:
+            # The job was dropped (session cleared) while we were waiting
+            if task.cancelled():
+                raise KeyError(audio_id)
+            raise
+
+    def cancel_session(self, session_id: str):
+        """Drop the session's pending jobs (and stop their synthesis)"""
+        for audio_id, job in list(self._jobs.items()):
+            if job["session_id"] == session_id:
+                self._cancel(audio_id)
+
+    def _cancel(self, audio_id: str):
+        job = self._jobs.pop(audio_id)
+        job["cancel_event"].set()
+        job["task"].cancel()
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.ttl
+        for audio_id, job in list(self._jobs.items()):
+            if job["submitted_at"] < cutoff:
+                self._cancel(audio_id)
+
+    @property
+    def pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job["task"].done())
+
+    async def stop(self):
+        tasks = [job["task"] for job in self._jobs.values()]
+        for audio_id in list(self._jobs):
+            self._cancel(audio_id)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+deferred_audio = DeferredAudio()
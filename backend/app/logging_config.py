@@ -0,0 +1,158 @@
+"""
+Non-blocking structured logging
+
+Records are put on an in-memory queue by a QueueHandler and written to stdout
+by a background QueueListener thread, so request handlers never block on I/O.
+Output is JSON (one object per line) carrying the session and persona ids of
+the current request; LOG_FORMAT=text switches to plain text for development.
+
+High-volume messages can opt into sampling with extra={"sampled": True}: only
+one in LOG_SAMPLE_EVERY of them (per message template) is kept.
+"""
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import atexit
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+
+session_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("session_id", default=None)
+persona_id_var: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("persona_id", default=None)
+
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bind_log_context(session_id: Optional[str] = None, persona_id: Optional[int] = None):
+    """Attach session / persona ids to every log record of the current request"""
+    session_id_var.set(session_id)
+    persona_id_var.set(persona_id)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the request context onto the record (runs in the logging thread's caller)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.session_id = session_id_var.get()
+        record.persona_id = persona_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in `every` records marked sampled, counted per message template"""
+
+    def __init__(self, every: int = 10):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts: Counter = Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        key = (record.name, record.msg)
+        count = self._counts[key]
+        self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback separate from the message"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        session_id = getattr(record, "session_id", None)
+        if session_id is not None:
+            entry["session_id"] = session_id
+        persona_id = getattr(record, "persona_id", None)
+        if persona_id is not None:
+            entry["persona_id"] = persona_id
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _start_listener(handler: logging.Handler):
+    global _listener
+    log_queue: queue.Queue = queue.Queue(-1)
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None):
+    """
+    Route all logging through a queue to a background writer thread.
+    Safe to call more than once; only the first call configures logging.
+
+    Args:
+        level: Root level (default LOG_LEVEL env or INFO)
+        log_format: "json" or "text" (default LOG_FORMAT env or json)
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    log_format = log_format or os.getenv("LOG_FORMAT", "json")
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if log_format == "text":
+        stream_handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    _queue_handler = StructuredQueueHandler(queue.Queue(-1))
+    # Filters run in the calling thread: context vars are read there, and
+    # sampled-out records are dropped before any formatting happens
+    _queue_handler.addFilter(ContextFilter())
+    _queue_handler.addFilter(SamplingFilter(int(os.getenv("LOG_SAMPLE_EVERY", "10"))))
+    _start_listener(stream_handler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    # Send uvicorn's loggers through the same queue
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    atexit.register(stop_logging)
+    # The listener thread does not survive fork (pre-fork launcher): restart it in children
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: _start_listener(stream_handler))
+
+
+def stop_logging():
+    """Flush pending records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,26 +1,63 @@
 """
 FastAPI application with AI SDK compatible streaming endpoint
 """
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import FastAPI, Request, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-import json
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
 import logging
+import os
 import sys
+import time
+from typing import AsyncIterator, Optional
 import requests
-from contextlib import asynccontextmanager
-from app.llm import OllamaClient
-from app.tts import KokoroTTS
+from contextlib import aclosing, asynccontextmanager
+from app.logging_config import setup_logging, bind_log_context
+from app.llm import ChatBackend, get_backend_class
+from app.tts import KokoroTTS, STREAM_FORMATS
+from app.stream_protocol import text_part, audio_part, data_part, error_part, finish_part
+from app.models import TTSRequest, PersonaResponse
 from app.database import init_db
-from app.routers import personas
+from app.routers import personas, transcripts, admin
 from app.services.persona_service import PersonaService
-
-logging.basicConfig(level=logging.INFO)
+from app.services.transcript_service import transcript_writer
+from app.services.greeting_cache import greeting_cache
+from app.cancellation import turn_registry, TurnCancelled
+from app.health import DependencyMonitor, model_in_list
+from app.profiling import loop_lag_monitor
+from app.load_shedding import LoadShedController, deferred_audio, parse_steps
+from app.audio_processing import AUDIO_PROFILES
+from app.prefill import PrefillScheduler
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
-OLLAMA_MODEL = "gemma3:1b"
+# LLM backend: "ollama" or "openai" (any server exposing an OpenAI-style /v1/chat/completions)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemma3:1b")
+LLM_API_KEY = os.getenv("LLM_API_KEY") or None
+LLM_BACKEND_CLASS = get_backend_class(LLM_BACKEND)
+
+# TTS CPU performance mode (see benchmarks/tts_cpu_mode.py to pick values per deployment)
+TTS_QUANTIZE = os.getenv("TTS_QUANTIZE", "0") == "1"
+TTS_NUM_THREADS = int(os.getenv("TTS_NUM_THREADS", "0")) or None
+TTS_INTEROP_THREADS = int(os.getenv("TTS_INTEROP_THREADS", "0")) or None
+# Speech text normalization before synthesis (markdown, emoji, numbers, abbreviations)
+TTS_NORMALIZE_TEXT = os.getenv("TTS_NORMALIZE_TEXT", "1") == "1"
+# Audio post-processing profile: "default" (24 kHz), "mobile" (16 kHz) or "raw" (no trimming/normalization)
+TTS_AUDIO_PROFILE = os.getenv("TTS_AUDIO_PROFILE", "default")
+
+# Load shedding: TTS jobs in flight / recent real-time factor at which each degraded mode starts
+LOAD_SHEDDING = os.getenv("LOAD_SHEDDING", "1") == "1"
+LOAD_SHED_QUEUE_STEPS = parse_steps(os.getenv("LOAD_SHED_QUEUE_STEPS", "2,4,6,8"), int)
+LOAD_SHED_RTF_STEPS = parse_steps(os.getenv("LOAD_SHED_RTF_STEPS", "0.6,0.9,1.2,1.6"))
+
+# Speculative prompt prefill on typing signals: pause before sending / minimum gap between prefills (seconds)
+PREFILL = os.getenv("PREFILL", "1") == "1"
+PREFILL_DEBOUNCE = float(os.getenv("PREFILL_DEBOUNCE", "0.4"))
+PREFILL_MIN_INTERVAL = float(os.getenv("PREFILL_MIN_INTERVAL", "2"))
 
 
 class StartupError(Exception):
@@ -28,61 +65,27 @@ class StartupError(Exception):
     pass
 
 
-def check_ollama_running() -> bool:
-    """Check if Ollama service is running"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        return response.status_code == 200
-    except requests.exceptions.RequestException:
-        return False
-
-
-def check_ollama_model_available(model: str) -> bool:
-    """Check if the required model is available in Ollama"""
+def get_available_llm_models() -> Optional[list[str]]:
+    """Get list of models served by the LLM backend (None if the server is unreachable)"""
+    headers = {"Authorization": f"Bearer {LLM_API_KEY}"} if LLM_API_KEY else {}
     try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
+        response = requests.get(f"{LLM_BASE_URL}{LLM_BACKEND_CLASS.models_path}", headers=headers, timeout=5)
         if response.status_code != 200:
-            return False
-        
-        data = response.json()
-        models = data.get("models", [])
-        model_names = [m.get("name", "") for m in models]
-        
-        # Check for exact match or match without tag (e.g., "qwen2.5:1.5b" or "qwen2.5")
-        for available_model in model_names:
-            if available_model == model or available_model.startswith(f"{model}:"):
-                return True
-            # Also check if requested model matches available (with or without :latest)
-            if model == available_model.replace(":latest", "") or available_model == f"{model}:latest":
-                return True
-        
-        return False
-    except requests.exceptions.RequestException:
-        return False
-
-
-def get_available_ollama_models() -> list[str]:
-    """Get list of available Ollama models"""
-    try:
-        response = requests.get(f"{OLLAMA_BASE_URL}/api/tags", timeout=5)
-        if response.status_code != 200:
-            return []
-        
-        data = response.json()
-        return [m.get("name", "") for m in data.get("models", [])]
-    except requests.exceptions.RequestException:
-        return []
+            return None
+        return LLM_BACKEND_CLASS.parse_models(response.json())
+    except (requests.exceptions.RequestException, ValueError):
+        return None
 
 
 def check_tts_available() -> tuple[bool, str]:
-    """Check if Kokoro TTS is properly configured"""
+    """
+    Check if Kokoro TTS is properly configured
+    Uses the already loaded tts_client (building a second pipeline would load
+    another copy of the model in every worker)
+    """
     try:
-        from kokoro import KPipeline
-        # Try to initialize the pipeline
-        pipeline = KPipeline(lang_code="p")  # Portuguese
+        tts_client.pipeline.load_voice(tts_client.voice)
         return True, "Kokoro TTS initialized successfully"
-    except ImportError as e:
-        return False, f"Kokoro TTS not installed: {e}"
     except Exception as e:
         return False, f"Kokoro TTS initialization error: {e}"
 
@@ -99,43 +102,46 @@ def validate_startup_dependencies():
     logger.info("Validating startup dependencies...")
     logger.info("=" * 60)
     
-    # Check 1: Ollama service
-    logger.info("Checking Ollama service...")
-    if not check_ollama_running():
+    # Check 1: LLM server
+    label = LLM_BACKEND_CLASS.label
+    is_ollama = LLM_BACKEND == "ollama"
+    logger.info("Checking %s...", label)
+    available_models = get_available_llm_models()
+    if available_models is None:
         errors.append(
-            f"❌ Ollama is not running at {OLLAMA_BASE_URL}\n"
-            f"   Please start Ollama with: ollama serve"
+            f"❌ {label} is not running at {LLM_BASE_URL}\n"
+            + ("   Please start Ollama with: ollama serve" if is_ollama else "   Please start the server or set LLM_BASE_URL")
         )
     else:
-        logger.info(f"✅ Ollama is running at {OLLAMA_BASE_URL}")
+        logger.info("✅ %s is running at %s", label, LLM_BASE_URL)
         
-        # Check 2: Required model
-        logger.info(f"Checking for model '{OLLAMA_MODEL}'...")
-        if not check_ollama_model_available(OLLAMA_MODEL):
-            available_models = get_available_ollama_models()
+        # Check 2: Required model (exact match or match without tag, e.g. "qwen2.5:1.5b" or "qwen2.5")
+        logger.info("Checking for model '%s'...", LLM_MODEL)
+        if not model_in_list(LLM_MODEL, available_models):
+            hint = f"Please run: ollama pull {LLM_MODEL}" if is_ollama else "Please load the model on the server or set LLM_MODEL"
             if available_models:
                 models_list = ", ".join(available_models)
                 errors.append(
-                    f"❌ Model '{OLLAMA_MODEL}' not found in Ollama\n"
+                    f"❌ Model '{LLM_MODEL}' not found in {label}\n"
                     f"   Available models: {models_list}\n"
-                    f"   Please run: ollama pull {OLLAMA_MODEL}"
+                    f"   {hint}"
                 )
             else:
                 errors.append(
-                    f"❌ Model '{OLLAMA_MODEL}' not found. No models installed.\n"
-                    f"   Please run: ollama pull {OLLAMA_MODEL}"
+                    f"❌ Model '{LLM_MODEL}' not found. No models installed.\n"
+                    f"   {hint}"
                 )
         else:
-            logger.info(f"✅ Model '{OLLAMA_MODEL}' is available")
+            logger.info("✅ Model '%s' is available", LLM_MODEL)
     
     # Check 3: TTS
     logger.info("Checking TTS service...")
     tts_ok, tts_message = check_tts_available()
     if not tts_ok:
         warnings.append(f"⚠️  TTS Warning: {tts_message}")
-        logger.warning(f"⚠️  TTS Warning: {tts_message}")
+        logger.warning("⚠️  TTS Warning: %s", tts_message)
     else:
-        logger.info(f"✅ {tts_message}")
+        logger.info("✅ %s", tts_message)
     
     # Report results
     logger.info("=" * 60)
@@ -158,6 +164,82 @@ def validate_startup_dependencies():
     logger.info("=" * 60)
 
 
+def create_llm_client(system_prompt: Optional[str] = None) -> ChatBackend:
+    """Build a chat client for the configured LLM backend"""
+    return LLM_BACKEND_CLASS(
+        base_url=LLM_BASE_URL,
+        model=LLM_MODEL,
+        system_prompt=system_prompt,
+        api_key=LLM_API_KEY,
+    )
+
+
+def apply_persona_settings(llm_client: ChatBackend, persona: Optional[PersonaResponse]):
+    """
+    Apply a persona's model and inference options (reply length, context size, ...)
+    Without a persona the server defaults are restored, so a session that drops
+    its persona does not keep the previous one's settings
+    """
+    if persona is None:
+        llm_client.model = LLM_MODEL
+        llm_client.options = {}
+        return
+    llm_client.model = persona.model or LLM_MODEL
+    llm_client.options = persona.llm_options()
+
+
+async def get_session_client(session_id: str, persona_id) -> tuple[ChatBackend, Optional[PersonaResponse]]:
+    """Look up the persona and get (or create) the session's conversation client"""
+    persona = None
+    system_prompt = None
+    if persona_id:
+        try:
+            persona = await PersonaService.get_by_id(int(persona_id))
+            if persona:
+                system_prompt = persona.system_prompt
+        except (ValueError, TypeError):
+            pass
+
+    # Get or create conversation client
+    if session_id not in conversations:
+        conversations[session_id] = create_llm_client(system_prompt)
+    else:
+        # Update system prompt if persona changed
+        if system_prompt and conversations[session_id].system_prompt != system_prompt:
+            conversations[session_id].system_prompt = system_prompt
+            conversations[session_id].is_first_message = True
+
+    llm_client = conversations[session_id]
+    apply_persona_settings(llm_client, persona)
+    return llm_client, persona
+
+
+async def synthesize_reply(
+    text: str,
+    cancel_event=None,
+    sample_rate: Optional[int] = None,
+    profile: Optional[str] = None,
+) -> tuple[str, float]:
+    """Synthesize a reply to base64 WAV, feeding the load-shedding controller"""
+    with load_controller.track_tts():
+        start = time.perf_counter()
+        audio_base64, duration = await tts_client.synthesize_to_base64_async(
+            text, cancel_event=cancel_event, sample_rate=sample_rate, profile=profile
+        )
+        load_controller.record_tts(time.perf_counter() - start, duration)
+    return audio_base64, duration
+
+
+async def synthesize_deferred(text: str, sample_rate: Optional[int], profile: Optional[str], cancel_event) -> dict:
+    """Background synthesis for a reply already sent as text (text_first mode)"""
+    try:
+        audio_base64, duration = await synthesize_reply(text, cancel_event, sample_rate, profile)
+        return {"audio": audio_base64, "duration": duration}
+    except Exception as e:
+        logger.error("Error generating deferred audio: %s", e)
+        return {"audio": None, "duration": 0, "error": str(e)}
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Validate dependencies first
@@ -169,10 +251,23 @@ async def lifespan(app: FastAPI):
     
     # Initialize database
     await init_db()
+    transcript_writer.start()
+
+    # Probe dependencies once before serving, then keep checking in the background
+    await dependency_monitor.check()
+    dependency_monitor.start()
+    loop_lag_monitor.start()
+    prefill_scheduler.start()
     
     logger.info("🚀 Server started successfully!")
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: flush pending transcript records
+    await loop_lag_monitor.stop()
+    await dependency_monitor.stop()
+    await deferred_audio.stop()
+    await prefill_scheduler.stop()
+    await greeting_cache.stop()
+    await transcript_writer.stop()
     logger.info("👋 Server shutting down...")
 
 
@@ -185,14 +280,42 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Total-Count", "X-Load-Mode"],
 )
 
 # Include routers
 app.include_router(personas.router)
+app.include_router(transcripts.router)
+app.include_router(admin.router)
 
 # Store conversation per session (simple in-memory, could use Redis for production)
-conversations: dict[str, OllamaClient] = {}
-tts_client = KokoroTTS(language="pt-BR")
+conversations: dict[str, ChatBackend] = {}
+tts_client = KokoroTTS(
+    language="pt-BR",
+    quantize=TTS_QUANTIZE,
+    num_threads=TTS_NUM_THREADS,
+    num_interop_threads=TTS_INTEROP_THREADS,
+    normalize_text=TTS_NORMALIZE_TEXT,
+    audio_profile=TTS_AUDIO_PROFILE,
+)
+load_controller = LoadShedController(
+    queue_steps=LOAD_SHED_QUEUE_STEPS,
+    rtf_steps=LOAD_SHED_RTF_STEPS,
+    enabled=LOAD_SHEDDING,
+)
+# Background greeting renders only while no load shedding is in effect; every
+# render counts as a TTS job in flight
+greeting_cache.attach(
+    tts_client,
+    can_prerender=lambda: load_controller.mode == "full",
+    track=load_controller.track_tts,
+)
+prefill_scheduler = PrefillScheduler(
+    debounce=PREFILL_DEBOUNCE,
+    min_interval=PREFILL_MIN_INTERVAL,
+    enabled=PREFILL,
+)
+dependency_monitor = DependencyMonitor(create_llm_client(), tts_client)
 
 
 @app.get("/")
@@ -202,8 +325,21 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {"status": "ok"}
+    """
+    Health check endpoint
+    Always 200 while the server is up; reports the cached dependency status
+    (no outbound requests per call)
+    """
+    return dependency_monitor.snapshot()
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness check: 200 when the LLM server and TTS were up at the last probe, 503 otherwise"""
+    return JSONResponse(
+        dependency_monitor.snapshot(),
+        status_code=status.HTTP_200_OK if dependency_monitor.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
 
 
 @app.get("/api/initial")
@@ -224,16 +360,16 @@ async def get_initial_message(persona_id: int = None):
                 )
         else:
             # Get first persona (default)
-            personas_list = await PersonaService.get_all()
+            personas_list = await PersonaService.get_all(limit=1)
             if not personas_list:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="No personas found"
                 )
-            persona = personas_list[0]
+            persona = await PersonaService.get_by_id(personas_list[0].id)
 
         initial_message = persona.initial_message
-        audio_base64, duration = await tts_client.synthesize_to_base64_async(initial_message)
+        audio_base64, duration = await greeting_cache.render(persona.id, initial_message)
         return {
             "text": initial_message,
             "audio": audio_base64,
@@ -244,48 +380,64 @@ async def get_initial_message(persona_id: int = None):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error generating initial audio: {e}")
+        logger.error("Error generating initial audio: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating initial audio: {str(e)}"
         )
 
 
-@app.post("/api/chat")
-async def chat(request: Request):
+@app.get("/api/tts/stats")
+async def tts_stats():
+    """TTS statistics (including phoneme cache hit rate)"""
+    return tts_client.stats()
+
+
+@app.post("/api/tts")
+async def text_to_speech(tts_request: TTSRequest):
     """
-    AI SDK compatible chat endpoint with streaming response
-    Returns text/event-stream for AI SDK useChat hook
+    Standalone streaming TTS endpoint
+    Streams audio with chunked transfer as each synthesis segment finishes:
+    a streaming WAV header followed by PCM frames, or Ogg pages
+    """
+    async def generate():
+        # Same synthesis executor as chat turns, so it counts toward the load-shedding queue
+        with load_controller.track_tts():
+            try:
+                async for data in tts_client.stream_async(
+                    tts_request.text, voice=tts_request.voice, format=tts_request.format
+                ):
+                    yield data
+            except Exception as e:
+                logger.error("Error streaming audio: %s", e)
+
+    return StreamingResponse(
+        generate(),
+        media_type=STREAM_FORMATS[tts_request.format],
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+async def parse_chat_request(request: Request) -> dict:
+    """
+    Shared setup of a chat turn for /api/chat and /api/chat/simple
+    Resolves the session client, records the user message and picks the
+    load-shedding mode; raises ValueError (sent back as {"error": ...}) for a bad request
     """
     body = await request.json()
     messages = body.get("messages", [])
     session_id = request.headers.get("x-session-id", "default")
     persona_id = body.get("persona_id") or request.headers.get("x-persona-id")
+    # Audio post-processing profile, e.g. "mobile" for 16 kHz (server default when omitted)
+    audio_profile = body.get("audio_profile") or request.headers.get("x-audio-profile")
+    if audio_profile and audio_profile not in AUDIO_PROFILES:
+        raise ValueError(f"Unknown audio profile: {audio_profile}")
 
-    # Get persona
-    system_prompt = None
-    if persona_id:
-        try:
-            persona = await PersonaService.get_by_id(int(persona_id))
-            if persona:
-                system_prompt = persona.system_prompt
-        except (ValueError, TypeError):
-            pass
-
-    # Get or create conversation client
-    if session_id not in conversations:
-        conversations[session_id] = OllamaClient(
-            base_url=OLLAMA_BASE_URL,
-            model=OLLAMA_MODEL,
-            system_prompt=system_prompt
-        )
-    else:
-        # Update system prompt if persona changed
-        if system_prompt and conversations[session_id].system_prompt != system_prompt:
-            conversations[session_id].system_prompt = system_prompt
-            conversations[session_id].is_first_message = True
-
-    llm_client = conversations[session_id]
+    llm_client, persona = await get_session_client(session_id, persona_id)
+    transcript_persona_id = persona.id if persona else None
+    bind_log_context(session_id, transcript_persona_id)
+    # The message is in; a prefill still waiting for the typing pause is now useless
+    prefill_scheduler.cancel_pending(session_id)
 
     # Get the last user message
     user_message = ""
@@ -295,38 +447,114 @@ async def chat(request: Request):
             break
 
     if not user_message:
-        return {"error": "No user message provided"}
+        raise ValueError("No user message provided")
+
+    logger.info("Received message: %s...", user_message[:50], extra={"sampled": True})
+    # Recorded before the LLM call, so the message is kept even if the turn fails or is cancelled
+    transcript_writer.record(session_id, transcript_persona_id, "user", user_message)
+    mode = load_controller.update()
+    return {
+        "session_id": session_id,
+        "persona_id": transcript_persona_id,
+        "llm_client": llm_client,
+        "user_message": user_message,
+        "audio_profile": audio_profile,
+        "mode": mode,
+        "sample_rate": load_controller.sample_rate(mode),
+    }
+
+
+async def run_chat_turn(request: Request, chat_turn: dict) -> AsyncIterator[tuple[str, object]]:
+    """
+    Run one chat turn: the LLM reply, then audio as the load-shedding mode allows
+
+    Yields ("text", reply), then ("audio", (audio_base64, duration)) or
+    ("audio_id", deferred audio id) unless audio is dropped or fails.
+    The turn is registered for cancellation while the generator runs (a new
+    message supersedes the session's previous turn); TurnCancelled propagates.
+    """
+    session_id = chat_turn["session_id"]
+    mode = chat_turn["mode"]
+    sample_rate = chat_turn["sample_rate"]
+    audio_profile = chat_turn["audio_profile"]
+    llm_client = chat_turn["llm_client"]
+
+    turn = turn_registry.start(session_id)
+    try:
+        # Get LLM response (cancelled if the client disconnects or interrupts)
+        llm_start = time.perf_counter()
+        options = load_controller.limit_options(llm_client.options, mode)
+        response_text = await turn_registry.run(turn, llm_client.chat(chat_turn["user_message"], options), request)
+        llm_ms = (time.perf_counter() - llm_start) * 1000
+        logger.info("LLM response: %s...", response_text[:50], extra={"sampled": True})
+        yield "text", response_text
+
+        # Generate audio after text (unless load shedding defers or drops it)
+        tts_ms = None
+        duration = None
+        if load_controller.at_least(mode, "text_only"):
+            pass
+        elif load_controller.at_least(mode, "text_first"):
+            audio_id = deferred_audio.submit(
+                session_id, lambda cancel_event: synthesize_deferred(response_text, sample_rate, audio_profile, cancel_event)
+            )
+            yield "audio_id", audio_id
+        else:
+            try:
+                tts_start = time.perf_counter()
+                audio_base64, duration = await turn_registry.run(
+                    turn,
+                    synthesize_reply(response_text, turn.cancel_event, sample_rate, audio_profile),
+                    request
+                )
+                tts_ms = (time.perf_counter() - tts_start) * 1000
+            except TurnCancelled:
+                raise
+            except Exception as e:
+                logger.error("Error generating audio: %s", e)
+            else:
+                yield "audio", (audio_base64, duration)
+
+        transcript_writer.record(
+            session_id, chat_turn["persona_id"], "assistant", response_text,
+            llm_ms=llm_ms, tts_ms=tts_ms, audio_duration=duration,
+        )
+    finally:
+        turn_registry.finish(turn)
 
-    logger.info(f"Received message: {user_message[:50]}...")
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    """
+    AI SDK compatible chat endpoint with streaming response
+    Returns text/event-stream for AI SDK useChat hook
+    """
+    try:
+        chat_turn = await parse_chat_request(request)
+    except ValueError as e:
+        return {"error": str(e)}
 
     async def generate():
         try:
-            # Get LLM response
-            response_text = await llm_client.chat(user_message)
-            logger.info(f"LLM response: {response_text[:50]}...")
-
-            # Stream the text response in AI SDK format
             # Format: data: {"type":"text","value":"..."}\n\n
-            yield f'0:"{response_text}"\n'
-
-            # Generate audio after text
-            try:
-                audio_base64, duration = await tts_client.synthesize_to_base64_async(response_text)
-                # Send audio as data message
-                audio_data = json.dumps({
-                    "audio": audio_base64,
-                    "duration": duration
-                })
-                yield f'2:[{{"audio":"{audio_base64}","duration":{duration}}}]\n'
-            except Exception as e:
-                logger.error(f"Error generating audio: {e}")
+            async with aclosing(run_chat_turn(request, chat_turn)) as events:
+                async for kind, value in events:
+                    if kind == "text":
+                        yield text_part(value)
+                    elif kind == "audio":
+                        yield audio_part(*value)
+                    elif kind == "audio_id":
+                        yield data_part({"audioId": value})
 
             # End stream
-            yield 'd:{"finishReason":"stop"}\n'
+            yield finish_part("stop")
 
+        except TurnCancelled as e:
+            logger.info("Chat turn cancelled: %s", e.reason)
+            yield finish_part("other")
         except Exception as e:
-            logger.error(f"Error in chat: {e}")
-            yield f'3:"{str(e)}"\n'
+            logger.error("Error in chat: %s", e)
+            yield error_part(str(e))
 
     return StreamingResponse(
         generate(),
@@ -334,6 +562,7 @@ async def chat(request: Request):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            "X-Load-Mode": chat_turn["mode"],
         }
     )
 
@@ -344,76 +573,106 @@ async def chat_simple(request: Request):
     Simple non-streaming chat endpoint (fallback)
     Returns JSON with text and audio
     """
+    try:
+        chat_turn = await parse_chat_request(request)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    response = {"text": None, "audio": None, "duration": 0, "load_mode": chat_turn["mode"]}
+    try:
+        async with aclosing(run_chat_turn(request, chat_turn)) as events:
+            async for kind, value in events:
+                if kind == "text":
+                    response["text"] = value
+                elif kind == "audio":
+                    response["audio"], response["duration"] = value
+                elif kind == "audio_id":
+                    response["audio_id"] = value
+        return response
+    except TurnCancelled as e:
+        logger.info("Chat turn cancelled: %s", e.reason)
+        return {"error": "cancelled", "reason": e.reason}
+    except Exception as e:
+        logger.error("Error in chat: %s", e)
+        return {"error": str(e)}
+
+
+@app.post("/api/chat/typing")
+async def chat_typing(request: Request):
+    """
+    Typing signal: the student is writing the next message
+    Warms the LLM server's prompt cache with the session's prompt (plus the draft)
+    once typing pauses, so the real turn starts generating sooner
+    """
     body = await request.json()
-    messages = body.get("messages", [])
     session_id = request.headers.get("x-session-id", "default")
     persona_id = body.get("persona_id") or request.headers.get("x-persona-id")
+    draft = body.get("text", "")
+    if not isinstance(draft, str):
+        return {"error": "text must be a string"}
 
-    # Get persona
-    system_prompt = None
-    if persona_id:
-        try:
-            persona = await PersonaService.get_by_id(int(persona_id))
-            if persona:
-                system_prompt = persona.system_prompt
-        except (ValueError, TypeError):
-            pass
+    # Under load the LLM server's time is better spent on real turns
+    if load_controller.mode != "full":
+        return {"status": "skipped", "load_mode": load_controller.mode}
 
-    # Get or create conversation client
-    if session_id not in conversations:
-        conversations[session_id] = OllamaClient(
-            base_url=OLLAMA_BASE_URL,
-            model=OLLAMA_MODEL,
-            system_prompt=system_prompt
-        )
-    else:
-        # Update system prompt if persona changed
-        if system_prompt and conversations[session_id].system_prompt != system_prompt:
-            conversations[session_id].system_prompt = system_prompt
-            conversations[session_id].is_first_message = True
+    llm_client, _ = await get_session_client(session_id, persona_id)
+    if not prefill_scheduler.signal(session_id, llm_client, draft):
+        return {"status": "disabled"}
+    return {"status": "scheduled"}
 
-    llm_client = conversations[session_id]
 
-    # Get the last user message
-    user_message = ""
-    for msg in reversed(messages):
-        if msg.get("role") == "user":
-            user_message = msg.get("content", "")
-            break
+@app.post("/api/session/{session_id}/interrupt")
+async def interrupt_session(session_id: str):
+    """Cancel the session's in-flight LLM generation and TTS work"""
+    interrupted = turn_registry.interrupt(session_id)
+    deferred_audio.cancel_session(session_id)
+    prefill_scheduler.cancel_session(session_id)
+    return {"status": "ok", "interrupted": interrupted}
 
-    if not user_message:
-        return {"error": "No user message provided"}
 
+@app.get("/api/audio/{audio_id}")
+async def get_deferred_audio(audio_id: str, wait: float = Query(25, ge=0, le=60)):
+    """
+    Audio of a reply that was sent text-first under load
+    Long-polls up to `wait` seconds; 202 while synthesis is still running
+    """
     try:
-        # Get LLM response
-        response_text = await llm_client.chat(user_message)
-
-        # Generate audio
-        try:
-            audio_base64, duration = await tts_client.synthesize_to_base64_async(response_text)
-        except Exception as e:
-            logger.error(f"Error generating audio: {e}")
-            audio_base64 = None
-            duration = 0
-
-        return {
-            "text": response_text,
-            "audio": audio_base64,
-            "duration": duration
-        }
-    except Exception as e:
-        logger.error(f"Error in chat: {e}")
-        return {"error": str(e)}
+        return await deferred_audio.result(audio_id, wait)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={"status": "pending"})
 
 
 @app.delete("/api/session/{session_id}")
 async def clear_session(session_id: str):
-    """Clear conversation history for a session"""
+    """Clear conversation history for a session (and cancel its in-flight turn)"""
+    turn_registry.interrupt(session_id)
+    deferred_audio.cancel_session(session_id)
+    prefill_scheduler.cancel_session(session_id)
     if session_id in conversations:
         del conversations[session_id]
     return {"status": "ok"}
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """Runtime metrics: chat turns (including cancellations), TTS, load shedding, prefill and transcript queue"""
+    return {
+        "turns": turn_registry.stats(),
+        "event_loop_lag": loop_lag_monitor.stats(),
+        "tts": tts_client.stats(),
+        "load_shedding": {**load_controller.stats(), "deferred_audio_pending": deferred_audio.pending},
+        "prefill": prefill_scheduler.stats(),
+        "transcripts": {
+            "pending": transcript_writer.pending,
+            "written": transcript_writer.written,
+            "dropped": transcript_writer.dropped,
+            "failed_flushes": transcript_writer.failed_flushes,
+        },
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
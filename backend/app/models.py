@@ -1,18 +1,48 @@
 """
 Pydantic models for persona validation
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+import json
 from enum import Enum
 from datetime import datetime
 
+from app.tts import KOKORO_VOICES
+
 
 class Language(str, Enum):
     PT_BR = "pt-BR"
     EN = "en"
 
 
-class PersonaBase(BaseModel):
+class InferenceSettings(BaseModel):
+    """Per-persona LLM settings; None falls back to the server / Ollama defaults"""
+    model: Optional[str] = Field(None, min_length=1, max_length=200, description="Ollama model name")
+    num_predict: Optional[int] = Field(None, ge=1, le=8192, description="Maximum tokens to generate per reply")
+    num_ctx: Optional[int] = Field(None, ge=256, le=131072, description="Context window size in tokens")
+    temperature: Optional[float] = Field(None, ge=0.0, le=2.0, description="Sampling temperature")
+    stop: Optional[List[str]] = Field(None, max_length=8, description="Stop sequences")
+
+    @field_validator("stop", mode="before")
+    @classmethod
+    def parse_stop(cls, value):
+        # Stored as a JSON array in SQLite
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def llm_options(self) -> dict:
+        """Ollama request options for the settings that are set"""
+        options = {
+            "num_predict": self.num_predict,
+            "num_ctx": self.num_ctx,
+            "temperature": self.temperature,
+            "stop": self.stop,
+        }
+        return {key: value for key, value in options.items() if value is not None}
+
+
+class PersonaBase(InferenceSettings):
     name: str = Field(..., min_length=1, max_length=200, description="Persona name")
     description: Optional[str] = Field(None, max_length=500, description="Persona description")
     system_prompt: str = Field(..., min_length=10, description="System prompt for LLM")
@@ -24,7 +54,8 @@ class PersonaCreate(PersonaBase):
     pass
 
 
-class PersonaUpdate(BaseModel):
+class PersonaUpdate(InferenceSettings):
+    """Partial update: omitted fields are unchanged; null clears an inference setting"""
     name: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=500)
     system_prompt: Optional[str] = Field(None, min_length=10)
@@ -39,3 +70,56 @@ class PersonaResponse(PersonaBase):
 
     class Config:
         from_attributes = True
+
+
+class PersonaSummary(BaseModel):
+    """Lightweight projection used by persona listings (no prompt/greeting text)"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    language: Language
+    created_at: str
+
+    class Config:
+        from_attributes = True
+
+
+class PersonaSearchResult(PersonaSummary):
+    """Persona summary with full-text search ranking and highlighted snippet"""
+    snippet: str
+    rank: float
+
+
+class PersonaImport(PersonaCreate):
+    """One NDJSON row of a bulk import; id is only honoured in upsert mode"""
+    id: Optional[int] = Field(None, ge=1, description="Existing persona id (upsert mode)")
+
+
+class BulkImportRowResult(BaseModel):
+    line: int
+    status: Literal["created", "updated", "error"]
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkImportRowResult]
+
+
+class TTSRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=5000, description="Text to synthesize")
+    voice: Optional[str] = Field(
+        None, pattern=r"^[a-z]{2}_[a-z]+$", max_length=50, description="Kokoro voice name (e.g. pf_dora)"
+    )
+    format: Literal["wav", "ogg"] = Field(default="wav", description="Streamed audio container")
+
+    @field_validator("voice")
+    @classmethod
+    def known_voice(cls, value):
+        # Never hand arbitrary names to KPipeline.load_voice (file paths, Hub downloads)
+        if value is not None and value not in KOKORO_VOICES:
+            raise ValueError(f"Unknown voice '{value}'")
+        return value
@@ -0,0 +1,174 @@
+"""
+Speculative prompt prefill while the student is typing
+
+Each turn the LLM server has to process the persona system prompt plus the
+whole conversation before it can produce the first token, and that only
+starts when the message is sent. The frontend sends a typing signal as the
+student types; after a short pause this sends the session's current prompt
+(history plus the draft so far) to the server with a one-token generation
+limit. Servers that keep a prompt cache (Ollama, llama.cpp, vLLM with prefix
+caching) then only have to process the new tail when the real turn arrives.
+
+Per session, signals are debounced (the prefill goes out once typing pauses)
+and rate limited (at most one prefill every min_interval seconds); a session
+that stops signalling for idle_timeout seconds is dropped along with any
+prefill still in flight.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+from app.llm import ChatBackend
+
+logger = logging.getLogger(__name__)
+
+
+class PrefillScheduler:
+    def __init__(
+        self,
+        debounce: float = 0.4,
+        min_interval: float = 2.0,
+        idle_timeout: float = 30.0,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            debounce: Seconds without a typing signal before the prefill is sent
+            min_interval: Minimum seconds between two prefills of a session
+            idle_timeout: Seconds without a typing signal after which a session is dropped
+            enabled: When False signals are ignored
+        """
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.idle_timeout = idle_timeout
+        self.enabled = enabled
+
+        self._sessions: dict[str, dict] = {}
+        self._purge_task: Optional[asyncio.Task] = None
+        self.signals = 0
+        self.sent = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def signal(self, session_id: str, llm_client: ChatBackend, draft: str = "") -> bool:
+        """
+        Record that the session is typing draft; returns False when prefill is disabled
+
+        The prefill itself runs in the background once the signals pause.
+        """
+        if not self.enabled:
+            return False
+        self._purge()
+        self.signals += 1
+        now = time.monotonic()
+        session = self._sessions.setdefault(session_id, {
+            "task": None,
+            "in_flight": False,
+            "last_sent": float("-inf"),
+            "sent_messages": None,
+        })
+        session.update(llm_client=llm_client, draft=draft, last_signal=now, pending=True)
+        if session["task"] is None or session["task"].done():
+            session["task"] = asyncio.create_task(self._run(session_id, session))
+        return True
+
+    async def _run(self, session_id: str, session: dict):
+        while session["pending"]:
+            now = time.monotonic()
+            fire_at = max(session["last_signal"] + self.debounce, session["last_sent"] + self.min_interval)
+            if now < fire_at:
+                await asyncio.sleep(fire_at - now)
+                continue
+            session["pending"] = False
+            llm_client = session["llm_client"]
+            messages = llm_client.build_messages(session["draft"])
+            if messages == session["sent_messages"]:
+                self.unchanged += 1
+                continue
+            session["last_sent"] = now
+            session["sent_messages"] = messages
+            session["in_flight"] = True
+            try:
+                start = time.perf_counter()
+                # A prefill slower than the idle timeout would be stale by the time it finished
+                await asyncio.wait_for(llm_client.prefill(messages), self.idle_timeout)
+                self.sent += 1
+                logger.debug(
+                    "Prefilled %d messages for session %s in %.0fms",
+                    len(messages), session_id, (time.perf_counter() - start) * 1000,
+                    extra={"sampled": True},
+                )
+            except Exception as e:
+                # Best effort: the real turn just runs without a warm cache
+                self.failed += 1
+                session["sent_messages"] = None
+                logger.warning("Prefill failed for session %s: %s", session_id, e, extra={"sampled": True})
+            finally:
+                session["in_flight"] = False
+
+    def cancel_pending(self, session_id: str):
+        """
+        Drop a prefill that has not been sent yet (the real turn is starting)
+
+        A prefill already in flight is left to finish: the server is processing
+        the same prefix the turn needs, so aborting it would only waste that work.
+        """
+        session = self._sessions.get(session_id)
+        if session and session["pending"]:
+            # The run loop exits at its next check instead of sending
+            session["pending"] = False
+            self.cancelled += 1
+
+    def cancel_session(self, session_id: str):
+        """Forget the session and stop its prefill, even if it is in flight"""
+        session = self._sessions.pop(session_id, None)
+        if session and session["task"] is not None and not session["task"].done():
+            session["task"].cancel()
+            self.cancelled += 1
+
+    def start(self):
+        """Start dropping idle sessions in the background"""
+        if self._purge_task is None:
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def _purge_loop(self):
+        # Checked twice per timeout, so a session is dropped at most 1.5x idle_timeout after its last signal
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            self._purge()
+
+    def _purge(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for session_id, session in list(self._sessions.items()):
+            if session["last_signal"] < cutoff:
+                self.cancel_session(session_id)
+
+    @property
+    def in_flight(self) -> int:
+        return sum(1 for session in self._sessions.values() if session["in_flight"])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self._sessions),
+            "in_flight": self.in_flight,
+            "signals": self.signals,
+            "sent": self.sent,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    async def stop(self):
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            try:
+                await self._purge_task
+            except asyncio.CancelledError:
+                pass
+            self._purge_task = None
+        tasks = [s["task"] for s in self._sessions.values() if s["task"] is not None]
+        for session_id in list(self._sessions):
+            self.cancel_session(session_id)
+        await asyncio.gather(*tasks, return_exceptions=True)
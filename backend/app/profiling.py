@@ -0,0 +1,191 @@
+"""
+Live profiling helpers (used by the admin router)
+
+- Wall-clock sampling profiler over all threads (event loop, TTS executor
+  threads, ...) producing collapsed stacks for flame graphs
+- Deterministic cProfile of the event loop thread, exported as pstats data
+- tracemalloc top allocations and snapshot diffs
+- Event loop lag monitor
+"""
+import asyncio
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Dedicated thread so the sampler never waits behind TTS jobs in the default executor
+_sampler_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profiler")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(duration: float, interval: float = 0.005) -> Counter:
+    """
+    Sample the stacks of every other thread for `duration` seconds.
+    This is wall-clock sampling: idle threads show up waiting in selectors / locks.
+
+    Returns:
+        Counter of "thread;outer;...;inner" -> sample count
+    """
+    own_id = threading.get_ident()
+    counts: Counter = Counter()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed_stacks(counts: Counter) -> str:
+    """Format samples in the collapsed-stack format read by flamegraph.pl / speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+async def sample_cpu(duration: float, interval: float = 0.005) -> str:
+    """Run the sampling profiler off the event loop and return collapsed stacks"""
+    loop = asyncio.get_event_loop()
+    counts = await loop.run_in_executor(_sampler_executor, sample_stacks, duration, interval)
+    return collapsed_stacks(counts)
+
+
+async def profile_event_loop(duration: float) -> bytes:
+    """
+    cProfile everything that runs on the event loop thread for `duration` seconds.
+    Returns marshalled pstats data (same format as Profile.dump_stats).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+class MemoryProfiler:
+    """tracemalloc control with a stored baseline snapshot for diffs"""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self._baseline = None
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def top(self, limit: int = 20, key_type: str = "lineno") -> dict:
+        snapshot = self._snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top": [
+                {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics(key_type)[:limit]
+            ],
+        }
+
+    def take_baseline(self):
+        self._baseline = self._snapshot()
+
+    def diff(self, limit: int = 20, key_type: str = "lineno") -> Optional[dict]:
+        """Compare the current heap with the baseline; None if no baseline was taken"""
+        if self._baseline is None:
+            return None
+        stats = self._snapshot().compare_to(self._baseline, key_type)
+        return {
+            "diff": [
+                {
+                    "location": str(stat.traceback),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a fixed sleep"""
+
+    def __init__(self, interval: float = 0.5, window: int = 240):
+        self.interval = interval
+        self._samples: deque = deque(maxlen=window)
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - start - self.interval) * 1000)
+            self._samples.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def stats(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "samples": len(samples),
+            "last_ms": round(self._samples[-1], 2),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "window_max_ms": round(samples[-1], 2),
+            "max_ms": round(self.max_lag_ms, 2),
+        }
+
+
+memory_profiler = MemoryProfiler()
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,107 @@
+"""
+Admin-only profiling router
+
+Enabled only when the ADMIN_TOKEN environment variable is set; requests must
+send it in the x-admin-token header.
+"""
+import asyncio
+import hmac
+import os
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+from typing import Literal, Optional
+from app.profiling import sample_cpu, profile_event_loop, memory_profiler, loop_lag_monitor
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject the request unless it carries the configured admin token"""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/admin/profile", tags=["admin"], dependencies=[Depends(require_admin)])
+
+# Only one CPU profile at a time
+_cpu_profile_lock = asyncio.Lock()
+
+KeyType = Literal["lineno", "filename", "traceback"]
+
+
+@router.post("/cpu")
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=60, description="Profiling duration"),
+    format: Literal["collapsed", "pstats"] = Query("collapsed"),
+    interval_ms: float = Query(5, ge=1, le=100, description="Sampling interval (collapsed only)"),
+):
+    """
+    Profile the live process while it keeps serving traffic.
+    collapsed: wall-clock sampling of every thread, as collapsed stacks (flame graphs)
+    pstats: cProfile of the event loop thread, as a pstats file (snakeviz, pstats module)
+    """
+    if _cpu_profile_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A CPU profile is already running")
+
+    async with _cpu_profile_lock:
+        if format == "pstats":
+            data = await profile_event_loop(seconds)
+            return Response(
+                data,
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="event_loop.pstats"'},
+            )
+        stacks = await sample_cpu(seconds, interval_ms / 1000)
+        return PlainTextResponse(stacks)
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(10, ge=1, le=50)):
+    """Start tracemalloc (adds allocation overhead until stopped)"""
+    memory_profiler.start(frames)
+    return {"tracing": True}
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop the baseline snapshot"""
+    memory_profiler.stop()
+    return {"tracing": False}
+
+
+@router.get("/memory/top")
+async def memory_top(limit: int = Query(20, ge=1, le=200), key: KeyType = Query("lineno")):
+    """Largest live allocations grouped by line / file / traceback"""
+    if not memory_profiler.tracing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not running")
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, memory_profiler.top, limit, key)
+
+
+@router.post("/memory/snapshot")
+async def memory_snapshot():
+    """Store a baseline snapshot for later diffs"""
+    if not memory_profiler.tracing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not running")
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, memory_profiler.take_baseline)
+    return {"status": "ok"}
+
+
+@router.get("/memory/diff")
+async def memory_diff(limit: int = Query(20, ge=1, le=200), key: KeyType = Query("lineno")):
+    """Allocation growth since the baseline snapshot"""
+    if not memory_profiler.tracing:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not running")
+    loop = asyncio.get_event_loop()
+    diff = await loop.run_in_executor(None, memory_profiler.diff, limit, key)
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="No baseline snapshot; POST /memory/snapshot first")
+    return diff
+
+
+@router.get("/loop-lag")
+async def loop_lag():
+    """Event loop lag (how late the loop wakes up from a fixed sleep)"""
+    return loop_lag_monitor.stats()
@@ -1,18 +1,172 @@
 """
 Persona management router
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-from app.models import PersonaCreate, PersonaUpdate, PersonaResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import AsyncIterator, List, Literal, Optional, Tuple
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+from app.models import (
+    PersonaCreate, PersonaUpdate, PersonaResponse, PersonaSummary, PersonaSearchResult,
+    PersonaImport, BulkImportRowResult, BulkImportResponse
+)
 from app.services.persona_service import PersonaService
+from app.services.greeting_cache import greeting_cache
 
 router = APIRouter(prefix="/api/personas", tags=["personas"])
 
 
-@router.get("/", response_model=List[PersonaResponse])
-async def list_personas():
-    """List all personas"""
-    return await PersonaService.get_all()
+def _list_etag(count: int, last_updated: Optional[str], limit: Optional[int], offset: int) -> str:
+    """Build a weak ETag for a persona listing page"""
+    key = f"{count}:{last_updated}:{limit}:{offset}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+
+def _last_modified(last_updated: Optional[str]) -> Optional[datetime]:
+    """Convert a stored updated_at (naive UTC isoformat) to an aware datetime, truncated to seconds"""
+    if not last_updated:
+        return None
+    try:
+        return datetime.fromisoformat(last_updated).replace(tzinfo=timezone.utc, microsecond=0)
+    except ValueError:
+        return None
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since (If-None-Match takes precedence)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@router.get("/", response_model=List[PersonaSummary])
+async def list_personas(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (omit for all)"),
+    offset: int = Query(0, ge=0, description="Number of personas to skip"),
+):
+    """
+    List personas as lightweight summaries.
+    The full system prompt is only returned by GET /api/personas/{id}.
+    Supports conditional GET through ETag / Last-Modified.
+    """
+    count, last_updated = await PersonaService.get_list_version()
+    etag = _list_etag(count, last_updated, limit, offset)
+    last_modified = _last_modified(last_updated)
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Total-Count": str(count),
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return await PersonaService.get_all(limit=limit, offset=offset)
+
+
+@router.get("/search", response_model=List[PersonaSearchResult])
+async def search_personas(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Ranked full-text search over persona name, description and system prompt.
+    Results include a highlighted snippet; the total match count is in X-Total-Count.
+    """
+    total, results = await PersonaService.search(q, limit=limit, offset=offset)
+    response.headers["X-Total-Count"] = str(total)
+    return results
+
+
+async def _iter_ndjson_lines(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Yield (line_number, raw line) for each non-blank line of an NDJSON request body
+
+    Lines are left undecoded so a bad line is reported with its row instead of
+    failing the whole import.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            if raw.strip():
+                yield line_number, raw
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+
+@router.get("/export")
+async def export_personas():
+    """Stream every full persona record as NDJSON (one JSON object per line)"""
+    async def generate():
+        async for persona in PersonaService.iter_export():
+            yield persona.model_dump_json() + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.post("/import", response_model=BulkImportResponse)
+async def import_personas(
+    request: Request,
+    mode: Literal["insert", "upsert"] = Query("insert", description="insert creates new personas; upsert honours ids"),
+):
+    """
+    Bulk import personas from an NDJSON body (one PersonaCreate object per line).
+    Valid rows are written in a single transaction; invalid rows are reported and skipped.
+    Greeting audio for imported personas is pre-rendered in the background afterwards.
+    """
+    results: List[BulkImportRowResult] = []
+    valid: List[Tuple[int, PersonaImport]] = []
+
+    async for line_number, raw in _iter_ndjson_lines(request):
+        try:
+            valid.append((line_number, PersonaImport.model_validate_json(raw.decode("utf-8"))))
+        except UnicodeDecodeError as e:
+            results.append(BulkImportRowResult(line=line_number, status="error", error=f"row: invalid UTF-8 ({e.reason})"))
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+            )
+            results.append(BulkImportRowResult(line=line_number, status="error", error=error))
+
+    imported = await PersonaService.bulk_import([p for _, p in valid], upsert=(mode == "upsert"))
+    for (line_number, _), (persona_id, row_status) in zip(valid, imported):
+        results.append(BulkImportRowResult(line=line_number, status=row_status, id=persona_id))
+    results.sort(key=lambda r: r.line)
+
+    greeting_cache.queue(
+        (persona_id, persona.initial_message)
+        for (_, persona), (persona_id, _) in zip(valid, imported)
+    )
+
+    return BulkImportResponse(
+        created=sum(1 for r in results if r.status == "created"),
+        updated=sum(1 for r in results if r.status == "updated"),
+        failed=sum(1 for r in results if r.status == "error"),
+        results=results,
+    )
 
 
 @router.get("/{persona_id}", response_model=PersonaResponse)
@@ -0,0 +1,36 @@
+"""
+Conversation transcript export router
+"""
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import json
+import logging
+from app.services.transcript_service import TranscriptService, transcript_writer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/transcripts", tags=["transcripts"])
+
+
+@router.get("/export")
+async def export_transcripts(
+    session_id: Optional[str] = Query(None, description="Filter by session id"),
+    persona_id: Optional[int] = Query(None, description="Filter by persona id"),
+):
+    """
+    Stream stored conversation turns as NDJSON (one JSON object per line).
+    Pending write-behind records are flushed first so recent turns are included;
+    if that write fails (e.g. the database is locked) the stored turns are still
+    exported and the pending ones stay queued for the next flush.
+    """
+    try:
+        await transcript_writer.flush()
+    except Exception as e:
+        logger.warning("Could not flush pending transcripts before export: %s", e)
+
+    async def generate():
+        async for turn in TranscriptService.iter_turns(session_id=session_id, persona_id=persona_id):
+            yield json.dumps(turn, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
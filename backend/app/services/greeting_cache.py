@@ -0,0 +1,120 @@
+"""
+Pre-rendered greeting audio per persona
+
+Greeting audio only depends on the persona's initial_message, so it is
+synthesized once (on demand or queued in bulk after imports) and reused by
+/api/initial until the message changes.
+"""
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import AbstractContextManager, nullcontext
+from typing import Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class GreetingCache:
+    def __init__(self, max_entries: int = 64):
+        """
+        Args:
+            max_entries: Maximum cached greetings (least recently used are evicted)
+        """
+        self.max_entries = max_entries
+        self.tts = None
+        self.can_prerender: Callable[[], bool] = lambda: True
+        self.track: Callable[[], AbstractContextManager] = nullcontext
+        self._entries: "OrderedDict[int, Tuple[str, str, float]]" = OrderedDict()
+        # Anything beyond max_entries would be evicted by the later renders anyway
+        self._queue: deque = deque(maxlen=max_entries)
+        self._task: Optional[asyncio.Task] = None
+        self.skipped = 0
+
+    def attach(
+        self,
+        tts_client,
+        can_prerender: Optional[Callable[[], bool]] = None,
+        track: Optional[Callable[[], AbstractContextManager]] = None,
+    ):
+        """
+        Set the TTS client used for rendering
+
+        Args:
+            tts_client: KokoroTTS instance
+            can_prerender: Checked before each background render; while it returns
+                False queued greetings are dropped (they render on demand instead)
+            track: Context manager factory entered around each synthesis
+                (e.g. to count it toward the TTS load)
+        """
+        self.tts = tts_client
+        if can_prerender is not None:
+            self.can_prerender = can_prerender
+        if track is not None:
+            self.track = track
+
+    def get(self, persona_id: int, initial_message: str) -> Optional[Tuple[str, float]]:
+        """Return (audio_base64, duration) if cached for this exact message"""
+        entry = self._entries.get(persona_id)
+        if entry is None or entry[0] != initial_message:
+            return None
+        self._entries.move_to_end(persona_id)
+        return entry[1], entry[2]
+
+    def put(self, persona_id: int, initial_message: str, audio_base64: str, duration: float):
+        self._entries[persona_id] = (initial_message, audio_base64, duration)
+        self._entries.move_to_end(persona_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def render(self, persona_id: int, initial_message: str) -> Tuple[str, float]:
+        """Get cached greeting audio or synthesize and cache it"""
+        cached = self.get(persona_id, initial_message)
+        if cached is not None:
+            return cached
+        with self.track():
+            audio_base64, duration = await self.tts.synthesize_to_base64_async(initial_message)
+        self.put(persona_id, initial_message, audio_base64, duration)
+        return audio_base64, duration
+
+    def queue(self, greetings: Iterable[Tuple[int, str]]):
+        """
+        Queue (persona_id, initial_message) pairs for background pre-rendering
+
+        Only the last max_entries pairs are kept, since the cache could not hold more.
+        """
+        if self.tts is None:
+            return
+        for item in greetings:
+            if len(self._queue) == self.max_entries:
+                self.skipped += 1
+            self._queue.append(item)
+        if self._queue and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Render one greeting at a time so bulk imports don't flood the executor
+        while self._queue:
+            if not self.can_prerender():
+                # Live turns come first; dropped greetings render on first use
+                logger.info("Skipping %d queued greeting renders under load", len(self._queue))
+                self.skipped += len(self._queue)
+                self._queue.clear()
+                return
+            persona_id, initial_message = self._queue.popleft()
+            try:
+                await self.render(persona_id, initial_message)
+            except Exception as e:
+                logger.error("Error pre-rendering greeting for persona %s: %s", persona_id, e)
+
+    async def stop(self):
+        """Cancel pending pre-rendering"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+greeting_cache = GreetingCache()
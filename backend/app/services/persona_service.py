@@ -2,36 +2,134 @@
 Persona service for CRUD operations
 """
 import aiosqlite
+import json
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
-from app.models import PersonaCreate, PersonaUpdate, PersonaResponse
+from app.models import (
+    PersonaCreate, PersonaUpdate, PersonaResponse, PersonaSummary, PersonaSearchResult, PersonaImport
+)
 from app.database import DB_PATH
 
 logger = logging.getLogger(__name__)
 
+# Columns of a full persona record (PersonaResponse)
+PERSONA_COLUMNS = (
+    "id, name, description, system_prompt, initial_message, language, "
+    "model, num_predict, num_ctx, temperature, stop, created_at, updated_at"
+)
+
+# Persona fields that map 1:1 to columns on insert/update
+WRITE_COLUMNS = (
+    "name", "description", "system_prompt", "initial_message", "language",
+    "model", "num_predict", "num_ctx", "temperature", "stop",
+)
+
+# bm25 column weights for personas_fts: name, description, system_prompt
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def persona_values(persona) -> tuple:
+    """Column values for WRITE_COLUMNS from a PersonaCreate"""
+    return (
+        persona.name,
+        persona.description,
+        persona.system_prompt,
+        persona.initial_message,
+        persona.language.value,
+        persona.model,
+        persona.num_predict,
+        persona.num_ctx,
+        persona.temperature,
+        json.dumps(persona.stop) if persona.stop is not None else None,
+    )
+
+
+def build_match_query(text: str) -> str:
+    """
+    Turn free user text into a safe FTS5 MATCH expression.
+    Each word becomes a quoted prefix term, so FTS5 operators in the input are not interpreted.
+    """
+    terms = []
+    for word in text.split():
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    return " ".join(terms)
+
 
 class PersonaService:
     @staticmethod
-    async def get_all() -> List[PersonaResponse]:
-        """Get all personas"""
+    async def get_all(limit: Optional[int] = None, offset: int = 0) -> List[PersonaSummary]:
+        """
+        Get personas as lightweight summaries (without system_prompt/initial_message)
+
+        Args:
+            limit: Maximum number of rows to return (None returns all)
+            offset: Number of rows to skip
+        """
         async with aiosqlite.connect(DB_PATH) as db:
             db.row_factory = aiosqlite.Row
             cursor = await db.execute("""
-                SELECT id, name, description, system_prompt, initial_message, language, created_at, updated_at
+                SELECT id, name, description, language, created_at
                 FROM personas
-                ORDER BY created_at DESC
-            """)
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """, (limit if limit is not None else -1, offset))
+            rows = await cursor.fetchall()
+            return [PersonaSummary(**dict(row)) for row in rows]
+
+    @staticmethod
+    async def get_list_version() -> Tuple[int, Optional[str]]:
+        """
+        Get (row count, max updated_at) for the personas table.
+        Used to build cache validators for the persona listing.
+        """
+        async with aiosqlite.connect(DB_PATH) as db:
+            cursor = await db.execute("SELECT COUNT(*), MAX(updated_at) FROM personas")
+            count, last_updated = await cursor.fetchone()
+            return count, last_updated
+
+    @staticmethod
+    async def search(query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[PersonaSearchResult]]:
+        """
+        Full-text search over name, description and system_prompt (FTS5 index)
+
+        Returns:
+            Tuple of (total_matches, ranked page of results)
+        """
+        match = build_match_query(query)
+        if not match:
+            return 0, []
+
+        async with aiosqlite.connect(DB_PATH) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM personas_fts WHERE personas_fts MATCH ?", (match,)
+            )
+            total = (await cursor.fetchone())[0]
+            if total == 0:
+                return 0, []
+
+            cursor = await db.execute("""
+                SELECT p.id, p.name, p.description, p.language, p.created_at,
+                       snippet(personas_fts, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                       bm25(personas_fts, ?, ?, ?) AS rank
+                FROM personas_fts
+                JOIN personas p ON p.id = personas_fts.rowid
+                WHERE personas_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            """, (*SEARCH_WEIGHTS, match, limit, offset))
             rows = await cursor.fetchall()
-            return [PersonaResponse(**dict(row)) for row in rows]
+            return total, [PersonaSearchResult(**dict(row)) for row in rows]
 
     @staticmethod
     async def get_by_id(persona_id: int) -> Optional[PersonaResponse]:
         """Get persona by ID"""
         async with aiosqlite.connect(DB_PATH) as db:
             db.row_factory = aiosqlite.Row
-            cursor = await db.execute("""
-                SELECT id, name, description, system_prompt, initial_message, language, created_at, updated_at
+            cursor = await db.execute(f"""
+                SELECT {PERSONA_COLUMNS}
                 FROM personas
                 WHERE id = ?
             """, (persona_id,))
@@ -45,22 +143,94 @@ class PersonaService:
         """Create a new persona"""
         now = datetime.utcnow().isoformat()
         async with aiosqlite.connect(DB_PATH) as db:
-            cursor = await db.execute("""
-                INSERT INTO personas (name, description, system_prompt, initial_message, language, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                persona.name,
-                persona.description,
-                persona.system_prompt,
-                persona.initial_message,
-                persona.language.value,
-                now,
-                now
-            ))
+            cursor = await db.execute(f"""
+                INSERT INTO personas ({', '.join(WRITE_COLUMNS)}, created_at, updated_at)
+                VALUES ({', '.join('?' * len(WRITE_COLUMNS))}, ?, ?)
+            """, (*persona_values(persona), now, now))
             await db.commit()
             persona_id = cursor.lastrowid
             return await PersonaService.get_by_id(persona_id)
 
+    @staticmethod
+    async def bulk_import(personas: List[PersonaImport], upsert: bool = False) -> List[Tuple[int, str]]:
+        """
+        Insert (or upsert) many personas with one executemany in a single transaction
+
+        In insert mode every row creates a new persona. In upsert mode rows whose
+        id already exists are updated (created_at is preserved) and the rest are
+        created, keeping the given id when present.
+
+        Returns:
+            List of (persona_id, "created" | "updated"), aligned with the input
+        """
+        if not personas:
+            return []
+
+        now = datetime.utcnow().isoformat()
+        async with aiosqlite.connect(DB_PATH) as db:
+            # Take the write lock up front so ids can be assigned without races
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = set()
+                wanted = [p.id for p in personas if upsert and p.id is not None]
+                if wanted:
+                    cursor = await db.execute(
+                        "SELECT id FROM personas WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(wanted),)
+                    )
+                    existing = {row[0] for row in await cursor.fetchall()}
+
+                cursor = await db.execute("""
+                    SELECT MAX(
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'personas'), 0),
+                        COALESCE((SELECT MAX(id) FROM personas), 0)
+                    )
+                """)
+                next_id = (await cursor.fetchone())[0]
+                if wanted:
+                    next_id = max(next_id, max(wanted))
+
+                results = []
+                params = []
+                for persona in personas:
+                    if upsert and persona.id is not None:
+                        persona_id = persona.id
+                        results.append((persona_id, "updated" if persona_id in existing else "created"))
+                        existing.add(persona_id)
+                    else:
+                        next_id += 1
+                        persona_id = next_id
+                        results.append((persona_id, "created"))
+                    params.append((persona_id, *persona_values(persona), now, now))
+
+                await db.executemany(f"""
+                    INSERT INTO personas (id, {', '.join(WRITE_COLUMNS)}, created_at, updated_at)
+                    VALUES (?, {', '.join('?' * len(WRITE_COLUMNS))}, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        {', '.join(f'{column} = excluded.{column}' for column in WRITE_COLUMNS)},
+                        updated_at = excluded.updated_at
+                """, params)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+        logger.info("Bulk imported %s personas", len(results))
+        return results
+
+    @staticmethod
+    async def iter_export() -> AsyncIterator[PersonaResponse]:
+        """Iterate over all full persona records in id order"""
+        async with aiosqlite.connect(DB_PATH) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(f"""
+                SELECT {PERSONA_COLUMNS}
+                FROM personas
+                ORDER BY id
+            """) as cursor:
+                async for row in cursor:
+                    yield PersonaResponse(**dict(row))
+
     @staticmethod
     async def update(persona_id: int, persona_update: PersonaUpdate) -> Optional[PersonaResponse]:
         """Update an existing persona"""
@@ -88,6 +258,15 @@ class PersonaService:
         if persona_update.language is not None:
             updates.append("language = ?")
             values.append(persona_update.language.value)
+        # Inference settings: an omitted field is left as is, an explicit null
+        # clears the column so the persona falls back to the server default
+        for column in ("model", "num_predict", "num_ctx", "temperature"):
+            if column in persona_update.model_fields_set:
+                updates.append(f"{column} = ?")
+                values.append(getattr(persona_update, column))
+        if "stop" in persona_update.model_fields_set:
+            updates.append("stop = ?")
+            values.append(json.dumps(persona_update.stop) if persona_update.stop is not None else None)
 
         if not updates:
             return existing
@@ -0,0 +1,161 @@
+"""
+Transcript persistence for conversations (write-behind)
+
+Chat endpoints only enqueue turn records; a background task drains the queue
+and writes them in batches with executemany inside one transaction per flush.
+"""
+import asyncio
+import aiosqlite
+import logging
+from typing import AsyncIterator, Optional
+from datetime import datetime
+from app.database import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+INSERT_SQL = """
+    INSERT INTO transcripts (session_id, persona_id, role, text, llm_ms, tts_ms, audio_duration, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+EXPORT_COLUMNS = (
+    "id", "session_id", "persona_id", "role", "text",
+    "llm_ms", "tts_ms", "audio_duration", "created_at",
+)
+
+
+class TranscriptWriter:
+    def __init__(self, flush_interval: float = 1.0, max_queue: int = 10000):
+        """
+        Args:
+            flush_interval: Seconds between background flushes
+            max_queue: Maximum pending records; new records are dropped when full
+        """
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        # Rows of a batch whose write failed, retried (first) on the next flush
+        self._retry: list = []
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def record(
+        self,
+        session_id: str,
+        persona_id: Optional[int],
+        role: str,
+        text: str,
+        llm_ms: Optional[float] = None,
+        tts_ms: Optional[float] = None,
+        audio_duration: Optional[float] = None,
+    ):
+        """Enqueue a turn record (never blocks the request path)"""
+        row = (
+            session_id, persona_id, role, text,
+            llm_ms, tts_ms, audio_duration,
+            datetime.utcnow().isoformat(),
+        )
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Transcript queue full, dropping record for session %s", session_id)
+
+    def start(self):
+        """Start the background flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write every pending record"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("Error flushing transcripts on shutdown, %d records lost: %s", self.pending, e)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Error flushing transcripts: %s", e)
+
+    async def flush(self) -> int:
+        """
+        Write all queued records in a single transaction; returns the number written
+
+        If the write fails (e.g. "database is locked" during a persona import)
+        the batch is kept and retried by the next flush before newer records.
+        """
+        async with self._lock:
+            batch, self._retry = self._retry, []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            if not batch:
+                return 0
+
+            try:
+                async with aiosqlite.connect(DB_PATH) as db:
+                    await db.executemany(INSERT_SQL, batch)
+                    await db.commit()
+            except Exception:
+                self.failed_flushes += 1
+                # Keep at most max_queue rows waiting; the oldest go first
+                overflow = len(batch) - self.max_queue
+                if overflow > 0:
+                    self.dropped += overflow
+                    logger.warning("Transcript retry buffer full, dropping %d oldest records", overflow)
+                    batch = batch[overflow:]
+                self._retry = batch
+                raise
+            self.written += len(batch)
+            return len(batch)
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+
+transcript_writer = TranscriptWriter()
+
+
+class TranscriptService:
+    @staticmethod
+    async def iter_turns(
+        session_id: Optional[str] = None,
+        persona_id: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        """Iterate stored turns in insertion order, optionally filtered"""
+        conditions = []
+        values = []
+        if session_id is not None:
+            conditions.append("session_id = ?")
+            values.append(session_id)
+        if persona_id is not None:
+            conditions.append("persona_id = ?")
+            values.append(persona_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        async with aiosqlite.connect(DB_PATH) as db:
+            async with db.execute(f"""
+                SELECT {', '.join(EXPORT_COLUMNS)}
+                FROM transcripts
+                {where}
+                ORDER BY id
+            """, values) as cursor:
+                async for row in cursor:
+                    yield dict(zip(EXPORT_COLUMNS, row))
@@ -0,0 +1,386 @@
+"""
+Speech-oriented text normalization for TTS (pt-BR and English)
+
+LLM replies carry markdown, emoji and stage directions ("*sorri*",
+"(risos)") that Kokoro either reads out or turns into pauses. Before
+synthesis the text is reduced to what should actually be spoken: markup is
+stripped and numbers, currency, percentages and common abbreviations are
+expanded into words. All patterns are compiled once at import.
+"""
+import re
+import threading
+from typing import Dict, List, Tuple
+
+# --- Markup -----------------------------------------------------------------
+
+CODE_BLOCK_RE = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+INLINE_CODE_RE = re.compile(r"`([^`]*)`")
+IMAGE_RE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+URL_RE = re.compile(r"\bhttps?://\S+|\bwww\.\S+")
+HEADING_RE = re.compile(r"^[ \t]*#{1,6}[ \t]*", re.MULTILINE)
+BLOCKQUOTE_RE = re.compile(r"^[ \t]*>+[ \t]?", re.MULTILINE)
+LIST_MARKER_RE = re.compile(r"^[ \t]*(?:[-*+•▪◦]|\d{1,3}[.)])[ \t]+", re.MULTILINE)
+HORIZONTAL_RULE_RE = re.compile(r"^[ \t]*(?:[-*_][ \t]*){3,}$", re.MULTILINE)
+TABLE_RULE_RE = re.compile(r"^[ \t]*\|?[ \t]*:?-{3,}:?[ \t]*(?:\|[ \t]*:?-{3,}:?[ \t]*)*\|?[ \t]*$", re.MULTILINE)
+STRONG_RE = re.compile(r"(\*\*|__|~~)(.+?)\1", re.DOTALL)
+# *italic* / _italic_ (stage directions in asterisks are removed before this runs)
+EMPHASIS_RE = re.compile(r"(?<![\w*])([*_])(?![\s*_])([^*_\n]+)(?<!\s)\1(?![\w*])")
+LEFTOVER_MARKUP_RE = re.compile(r"[*_#`|~<>]+")
+BRACKETED_RE = re.compile(r"\[[^\]\n]*\]")
+
+EMOJI_RE = re.compile(
+    "["
+    "\U0001F000-\U0001FAFF"  # pictographs, emoticons, transport, symbols & pictographs
+    "\u2600-\u27BF"          # misc symbols and dingbats
+    "\u2B00-\u2BFF"          # arrows, stars
+    "\uFE00-\uFE0F"          # variation selectors
+    "\u200D"                 # zero width joiner
+    "\u20E3"                 # combining keycap
+    "]+"
+)
+
+STAGE_WORDS = {
+    "pt-BR": r"risos|risadas?|rindo|ri|sorri(?:ndo)?|suspira(?:ndo)?|suspiro|pausa|pensativo|pensando|hesita(?:ndo)?|tosse|gaguejando",
+    "en": r"laughs?|laughing|chuckles?|smiles?|smiling|sighs?|sighing|pauses?|thinking|hesitates?|coughs?",
+}
+STAGE_DIRECTION_RE = {
+    language: re.compile(rf"\(\s*(?:{words})\b[^()\n]{{0,40}}\)", re.IGNORECASE)
+    for language, words in STAGE_WORDS.items()
+}
+# Role-play actions in asterisks ("*sorri*", "*suspira fundo*"); other *spans* are emphasis
+ACTION_RE = {
+    language: re.compile(rf"(?<![\w*])\*\s*(?:{words})\b[^*\n]{{0,40}}\*(?![\w*])", re.IGNORECASE)
+    for language, words in STAGE_WORDS.items()
+}
+
+REPEATED_PUNCTUATION_RE = re.compile(r"([!?])[!?]+")
+SPACE_BEFORE_PUNCTUATION_RE = re.compile(r"[ \t]+([,.;:!?])")
+HORIZONTAL_SPACE_RE = re.compile(r"[ \t]+")
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+# --- Abbreviations ------------------------------------------------------------
+
+ABBREVIATIONS = {
+    "pt-BR": {
+        "Sr.": "senhor", "Sra.": "senhora", "Srta.": "senhorita",
+        "Dr.": "doutor", "Dra.": "doutora", "Prof.": "professor", "Profa.": "professora",
+        "etc.": "etcétera", "p.ex.": "por exemplo", "ex.:": "exemplo:", "obs.:": "observação:",
+        "vc": "você", "vcs": "vocês", "tb": "também", "tbm": "também", "pq": "porque",
+        "qdo": "quando", "msg": "mensagem", "nº": "número", "n.º": "número",
+    },
+    "en": {
+        "Mr.": "mister", "Mrs.": "missus", "Ms.": "miz", "Dr.": "doctor", "Prof.": "professor",
+        "e.g.": "for example", "i.e.": "that is", "etc.": "et cetera", "vs.": "versus",
+        "approx.": "approximately",
+    },
+}
+ABBREVIATION_RE = {
+    language: re.compile(
+        r"(?<![\w.])(" + "|".join(re.escape(abbr) for abbr in sorted(table, key=len, reverse=True)) + r")(?=\s|$|[.,;:!?)])",
+        re.IGNORECASE,
+    )
+    for language, table in ABBREVIATIONS.items()
+}
+
+# "No." only stands for "number" right before one ("No. 5"); anywhere else it is the word "no"
+NUMBER_SIGN_RE = re.compile(r"(?<![\w.])[Nn]o\.(?=\s*\d)")
+
+UNITS = {
+    "pt-BR": {"km": "quilômetros", "kg": "quilos", "g": "gramas", "ml": "mililitros", "l": "litros",
+              "h": "horas", "min": "minutos", "cm": "centímetros", "m": "metros"},
+    "en": {"km": "kilometers", "kg": "kilograms", "g": "grams", "ml": "milliliters", "l": "liters",
+           "h": "hours", "min": "minutes", "cm": "centimeters", "m": "meters"},
+}
+
+# --- Numbers ------------------------------------------------------------------
+
+# Thousands grouping and decimal mark differ: 1.234,5 (pt-BR) vs 1,234.5 (en)
+NUMBER_RE = {
+    "pt-BR": re.compile(r"(?<![\w.,])(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?(?![\w]|[.,]\d)"),
+    "en": re.compile(r"(?<![\w.,])(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?(?![\w]|[.,]\d)"),
+}
+CURRENCY_RE = {
+    "pt-BR": re.compile(r"R\$\s?(\d[\d.]*(?:,\d+)?)"),
+    "en": re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)"),
+}
+PERCENT_RE = re.compile(r"(\d[\d.,]*)\s?%")
+ORDINAL_RE = {
+    "pt-BR": re.compile(r"\b(\d{1,2})\s?([ºª°])"),
+    "en": re.compile(r"\b(\d+)(st|nd|rd|th)\b", re.IGNORECASE),
+}
+UNIT_RE = {
+    language: re.compile(r"(\d)\s?(" + "|".join(sorted(units, key=len, reverse=True)) + r")\b")
+    for language, units in UNITS.items()
+}
+
+PT_UNITS = [
+    "zero", "um", "dois", "três", "quatro", "cinco", "seis", "sete", "oito", "nove", "dez",
+    "onze", "doze", "treze", "catorze", "quinze", "dezesseis", "dezessete", "dezoito", "dezenove",
+]
+PT_TENS = ["", "", "vinte", "trinta", "quarenta", "cinquenta", "sessenta", "setenta", "oitenta", "noventa"]
+PT_HUNDREDS = ["", "cento", "duzentos", "trezentos", "quatrocentos", "quinhentos",
+               "seiscentos", "setecentos", "oitocentos", "novecentos"]
+PT_SCALES = [(10 ** 9, "bilhão", "bilhões"), (10 ** 6, "milhão", "milhões")]
+PT_ORDINALS = ["", "primeir", "segund", "terceir", "quart", "quint", "sext", "sétim", "oitav", "non", "décim"]
+PT_ORDINAL_TENS = ["", "décim", "vigésim", "trigésim", "quadragésim", "quinquagésim",
+                   "sexagésim", "septuagésim", "octogésim", "nonagésim"]
+
+EN_UNITS = [
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen",
+]
+EN_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+EN_SCALES = [(10 ** 9, "billion"), (10 ** 6, "million"), (10 ** 3, "thousand")]
+EN_ORDINAL_WORDS = {"one": "first", "two": "second", "three": "third", "five": "fifth",
+                    "eight": "eighth", "nine": "ninth", "twelve": "twelfth"}
+
+# Longer numbers (ids, phone numbers) are read digit by digit
+MAX_SPOKEN_NUMBER = 10 ** 12 - 1
+
+
+def _pt_below_thousand(n: int) -> str:
+    if n < 20:
+        return PT_UNITS[n]
+    if n < 100:
+        tens, units = divmod(n, 10)
+        return PT_TENS[tens] + (f" e {PT_UNITS[units]}" if units else "")
+    if n == 100:
+        return "cem"
+    hundreds, rest = divmod(n, 100)
+    return PT_HUNDREDS[hundreds] + (f" e {_pt_below_thousand(rest)}" if rest else "")
+
+
+def pt_number_words(n: int) -> str:
+    """Cardinal number in Brazilian Portuguese words (masculine)"""
+    if n < 1000:
+        return _pt_below_thousand(n)
+    groups: List[Tuple[int, str]] = []
+    rest = n
+    for scale, singular, plural in PT_SCALES:
+        count, rest = divmod(rest, scale)
+        if count:
+            groups.append((count, f"{pt_number_words(count)} {singular if count == 1 else plural}"))
+    thousands, rest = divmod(rest, 1000)
+    if thousands:
+        groups.append((thousands, "mil" if thousands == 1 else f"{_pt_below_thousand(thousands)} mil"))
+    if rest:
+        groups.append((rest, _pt_below_thousand(rest)))
+    words = groups[0][1]
+    for count, group in groups[1:]:
+        # "e" joins a group only when it is below 100 or a round hundred
+        words += (" e " if count < 100 or count % 100 == 0 else " ") + group
+    return words
+
+
+def _en_below_thousand(n: int) -> str:
+    if n < 20:
+        return EN_UNITS[n]
+    if n < 100:
+        tens, units = divmod(n, 10)
+        return EN_TENS[tens] + (f"-{EN_UNITS[units]}" if units else "")
+    hundreds, rest = divmod(n, 100)
+    return f"{EN_UNITS[hundreds]} hundred" + (f" {_en_below_thousand(rest)}" if rest else "")
+
+
+def en_number_words(n: int) -> str:
+    """Cardinal number in English words"""
+    if n < 1000:
+        return _en_below_thousand(n)
+    parts: List[str] = []
+    rest = n
+    for scale, name in EN_SCALES:
+        count, rest = divmod(rest, scale)
+        if count:
+            parts.append(f"{en_number_words(count)} {name}")
+    if rest:
+        parts.append(_en_below_thousand(rest))
+    return " ".join(parts)
+
+
+def number_words(n: int, language: str) -> str:
+    return pt_number_words(n) if language == "pt-BR" else en_number_words(n)
+
+
+def _digits(value: str, language: str) -> str:
+    return " ".join(number_words(int(digit), language) for digit in value)
+
+
+def _integer(value: str, language: str) -> str:
+    digits = re.sub(r"\D", "", value)
+    if not digits:
+        return value
+    n = int(digits)
+    if n > MAX_SPOKEN_NUMBER or (len(digits) > 1 and digits.startswith("0")):
+        return _digits(digits, language)
+    return number_words(n, language)
+
+
+def _decimal(integer: str, fraction: str, language: str) -> str:
+    point = "vírgula" if language == "pt-BR" else "point"
+    fraction_words = (
+        _integer(fraction, language) if language == "pt-BR" and not fraction.startswith("0")
+        else _digits(fraction, language)
+    )
+    return f"{_integer(integer, language)} {point} {fraction_words}"
+
+
+def _split_amount(value: str, language: str) -> Tuple[str, str]:
+    decimal_mark = "," if language == "pt-BR" else "."
+    integer, _, fraction = value.partition(decimal_mark)
+    return integer, fraction
+
+
+def _amount(value: str, language: str) -> str:
+    integer, fraction = _split_amount(value.rstrip(".,"), language)
+    return _decimal(integer, fraction, language) if fraction else _integer(integer, language)
+
+
+def _currency(match: "re.Match", language: str) -> str:
+    integer, fraction = _split_amount(match.group(1).rstrip(".,"), language)
+    whole = int(re.sub(r"\D", "", integer) or 0)
+    cents = int((fraction + "0")[:2]) if fraction else 0
+    if language == "pt-BR":
+        words = f"{_integer(integer, language)} {'real' if whole == 1 else 'reais'}"
+        if cents:
+            words += f" e {pt_number_words(cents)} {'centavo' if cents == 1 else 'centavos'}"
+    else:
+        words = f"{_integer(integer, language)} {'dollar' if whole == 1 else 'dollars'}"
+        if cents:
+            words += f" and {en_number_words(cents)} {'cent' if cents == 1 else 'cents'}"
+    return words
+
+
+def _ordinal(match: "re.Match", language: str) -> str:
+    n = int(match.group(1))
+    if language == "pt-BR":
+        ending = "a" if match.group(2) == "ª" else "o"
+        if n == 0 or n >= 100:
+            return match.group(0)
+        tens, units = divmod(n, 10)
+        words = []
+        if tens:
+            words.append(PT_ORDINAL_TENS[tens] + ending)
+        if units:
+            words.append(PT_ORDINALS[units] + ending)
+        return " ".join(words)
+    words = en_number_words(n)
+    head, sep, last = words.rpartition(" ") if " " in words else ("", "", words)
+    prefix, dash, last = last.rpartition("-") if "-" in last else ("", "", last)
+    if last in EN_ORDINAL_WORDS:
+        last = EN_ORDINAL_WORDS[last]
+    elif last.endswith("y"):
+        last = last[:-1] + "ieth"
+    else:
+        last += "th"
+    return f"{head}{sep}{prefix}{dash}{last}"
+
+
+def _percent(match: "re.Match", language: str) -> str:
+    return f"{_amount(match.group(1), language)} {'por cento' if language == 'pt-BR' else 'percent'}"
+
+
+def _number(match: "re.Match", language: str) -> str:
+    integer, fraction = match.group(1), match.group(2)
+    return _decimal(integer, fraction, language) if fraction else _integer(integer, language)
+
+
+def speech_language(language: str) -> str:
+    """Map a TTS language ("pt-BR", "en", "en-US", ...) to a normalization table"""
+    return "pt-BR" if language.lower().startswith("pt") else "en"
+
+
+def normalize_for_speech(text: str, language: str = "pt-BR") -> str:
+    """
+    Reduce an LLM reply to the text that should be spoken
+
+    Strips markdown, URLs, emoji and stage directions, then expands
+    abbreviations, currency, percentages, ordinals, units and numbers.
+    Line breaks are kept, since they mark sentence boundaries for synthesis.
+    """
+    language = speech_language(language)
+
+    # Markup
+    text = CODE_BLOCK_RE.sub(" ", text)
+    text = INLINE_CODE_RE.sub(r"\1", text)
+    text = IMAGE_RE.sub(r"\1", text)
+    text = LINK_RE.sub(r"\1", text)
+    text = URL_RE.sub(" ", text)
+    text = HORIZONTAL_RULE_RE.sub("", text)
+    text = TABLE_RULE_RE.sub("", text)
+    text = HEADING_RE.sub("", text)
+    text = BLOCKQUOTE_RE.sub("", text)
+    text = LIST_MARKER_RE.sub("", text)
+    text = STRONG_RE.sub(r"\2", text)
+    text = ACTION_RE[language].sub(" ", text)
+    text = EMPHASIS_RE.sub(r"\2", text)
+    text = STAGE_DIRECTION_RE[language].sub(" ", text)
+    text = BRACKETED_RE.sub(" ", text)
+    text = EMOJI_RE.sub(" ", text)
+    text = LEFTOVER_MARKUP_RE.sub(" ", text)
+
+    # Words for things Kokoro would spell out or misread
+    abbreviations = {abbr.lower(): words for abbr, words in ABBREVIATIONS[language].items()}
+    text = ABBREVIATION_RE[language].sub(lambda m: abbreviations[m.group(1).lower()], text)
+    if language == "en":
+        text = NUMBER_SIGN_RE.sub("number ", text)
+    text = CURRENCY_RE[language].sub(lambda m: _currency(m, language), text)
+    text = PERCENT_RE.sub(lambda m: _percent(m, language), text)
+    text = ORDINAL_RE[language].sub(lambda m: _ordinal(m, language), text)
+    units = UNITS[language]
+    text = UNIT_RE[language].sub(lambda m: f"{m.group(1)} {units[m.group(2)]}", text)
+    text = NUMBER_RE[language].sub(lambda m: _number(m, language), text)
+
+    # Whitespace and punctuation left behind by the removals
+    text = REPEATED_PUNCTUATION_RE.sub(r"\1", text)
+    text = HORIZONTAL_SPACE_RE.sub(" ", text)
+    text = SPACE_BEFORE_PUNCTUATION_RE.sub(r"\1", text)
+    text = BLANK_LINES_RE.sub("\n", text)
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+class SpeechNormalizer:
+    """
+    normalize_for_speech bound to a language, with running totals of what
+    it saved. normalize() keeps no state; the totals are updated and read
+    under one lock, as record() is called from several synthesis threads.
+    """
+
+    def __init__(self, language: str = "pt-BR"):
+        self.language = speech_language(language)
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        self.est_seconds_saved = 0.0
+
+    def normalize(self, text: str) -> str:
+        return normalize_for_speech(text, self.language)
+
+    def record(self, original: str, spoken: str, duration: float) -> Dict[str, float]:
+        """
+        Account for one synthesized text and return what normalization saved.
+        Seconds saved are not measured (the original text is never
+        synthesized): they are estimated from the spoken text's own rate
+        (duration / spoken chars). Both values are negative when expansion
+        (numbers to words) added more than stripping removed.
+        """
+        chars_saved = len(original) - len(spoken)
+        est_seconds_saved = chars_saved * duration / len(spoken) if spoken else 0.0
+        with self._lock:
+            self.texts += 1
+            self.chars_in += len(original)
+            self.chars_out += len(spoken)
+            self.est_seconds_saved += est_seconds_saved
+        return {"chars_saved": chars_saved, "est_seconds_saved": est_seconds_saved}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "language": self.language,
+                "texts": self.texts,
+                "chars_in": self.chars_in,
+                "chars_out": self.chars_out,
+                "chars_saved": self.chars_in - self.chars_out,
+                "est_seconds_saved": round(self.est_seconds_saved, 2),
+            }
@@ -0,0 +1,27 @@
+"""
+AI SDK data stream parts written by the /api/chat streaming endpoint
+
+Each part is one line, "<type>:<json value>\n". Kept separate from the
+endpoint so the frame building can be benchmarked on its own.
+"""
+import json
+
+
+def text_part(text: str) -> str:
+    return f'0:"{text}"\n'
+
+
+def audio_part(audio_base64: str, duration: float) -> str:
+    return f'2:[{{"audio":"{audio_base64}","duration":{duration}}}]\n'
+
+
+def data_part(value: dict) -> str:
+    return f"2:[{json.dumps(value)}]\n"
+
+
+def error_part(message: str) -> str:
+    return f'3:"{message}"\n'
+
+
+def finish_part(reason: str) -> str:
+    return f'd:{{"finishReason":"{reason}"}}\n'
@@ -3,9 +3,16 @@ Kokoro TTS integration for Portuguese Brazilian and English
 """
 import base64
 import io
-import wave
+import logging
+import re
 import struct
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from app.speech_text import SpeechNormalizer
+from app.audio_processing import AUDIO_PROFILES, postprocess_chunks
+
+logger = logging.getLogger(__name__)
 
 
 # Kokoro language codes
@@ -23,100 +30,473 @@ DEFAULT_VOICES = {
     "b": "bf_emma",      # British female
 }
 
+# Voices shipped with Kokoro-82M v1.0 for the languages above. Only these
+# names are accepted from clients: load_voice treats a name ending in .pt as a
+# local file path, downloads any other name from the HF Hub and caches every
+# comma-separated mix forever
+KOKORO_VOICES = frozenset({
+    "pf_dora", "pm_alex", "pm_santa",
+    "af_heart", "af_alloy", "af_aoede", "af_bella", "af_jessica", "af_kore", "af_nicole",
+    "af_nova", "af_river", "af_sarah", "af_sky",
+    "am_adam", "am_echo", "am_eric", "am_fenrir", "am_liam", "am_michael", "am_onyx",
+    "am_puck", "am_santa",
+    "bf_alice", "bf_emma", "bf_isabella", "bf_lily",
+    "bm_daniel", "bm_fable", "bm_george", "bm_lewis",
+})
+
 SAMPLE_RATE = 24000
 
+# Formats supported by the streaming endpoint
+STREAM_FORMATS = {
+    "wav": "audio/wav",
+    "ogg": "audio/ogg",
+}
+
+
+def wav_header(num_frames: Optional[int] = None, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    Build a 44-byte PCM16 mono WAV header.
+    With num_frames=None the RIFF/data sizes are set to 0xFFFFFFFF, the usual
+    "unknown length" marker for streamed WAV.
+    """
+    if num_frames is None:
+        data_size = riff_size = 0xFFFFFFFF
+    else:
+        data_size = num_frames * 2
+        riff_size = 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_size,
+    )
+
+
+# Samples converted per step when writing PCM, bounds the float scratch buffer
+PCM_BLOCK_SIZE = 16384
+
+
+def write_pcm16(out, audio):
+    """
+    Write a float audio chunk into an int16 array view, clipping to [-1, 1]
+    instead of letting out-of-range samples wrap around.
+    Works in fixed-size blocks so no full-length float temporary is allocated.
+    """
+    import numpy as np
+
+    audio = np.asarray(audio, dtype=np.float32)
+    scratch = np.empty(min(len(audio), PCM_BLOCK_SIZE), dtype=np.float32)
+    for start in range(0, len(audio), PCM_BLOCK_SIZE):
+        block = audio[start:start + PCM_BLOCK_SIZE]
+        tmp = scratch[:len(block)]
+        np.clip(block, -1.0, 1.0, out=tmp)
+        tmp *= 32767
+        np.copyto(out[start:start + len(block)], tmp, casting="unsafe")
+
+
+def float_to_pcm16(audio) -> bytes:
+    """Convert a float audio chunk in [-1, 1] to little-endian int16 bytes"""
+    import numpy as np
+
+    out = np.empty(len(audio), dtype="<i2")
+    write_pcm16(out, audio)
+    return out.tobytes()
+
+
+def assemble_wav(chunks, sample_rate: int = SAMPLE_RATE) -> Tuple[memoryview, int]:
+    """
+    Assemble float audio chunks into a WAV file without intermediate copies.
+    A single buffer is allocated for header + samples; each chunk's int16
+    samples are written straight into it behind the precomputed header.
+
+    Returns:
+        Tuple of (wav memoryview, number_of_frames)
+    """
+    import numpy as np
+
+    num_frames = sum(len(chunk) for chunk in chunks)
+    header = wav_header(num_frames, sample_rate)
+    buffer = bytearray(len(header) + num_frames * 2)
+    buffer[:len(header)] = header
+
+    samples = np.frombuffer(buffer, dtype="<i2", offset=len(header))
+    position = 0
+    for chunk in chunks:
+        write_pcm16(samples[position:position + len(chunk)], chunk)
+        position += len(chunk)
+
+    return memoryview(buffer), num_frames
+
+
+class OggStreamEncoder:
+    """Incremental Ogg/Vorbis encoder that hands back finished pages as they are produced"""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        try:
+            import soundfile as sf
+        except ImportError:
+            raise ImportError(
+                "soundfile not installed. Install with: pip install soundfile"
+            )
+        self._buffer = io.BytesIO()
+        self._file = sf.SoundFile(
+            self._buffer, mode="w", samplerate=sample_rate, channels=1,
+            format="OGG", subtype="VORBIS",
+        )
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def encode(self, audio) -> bytes:
+        """Encode a float chunk; returns whatever Ogg pages are complete so far"""
+        import numpy as np
+
+        self._file.write(np.asarray(audio, dtype=np.float32))
+        return self._drain()
+
+    def close(self) -> bytes:
+        """Finish the stream and return the remaining pages"""
+        self._file.close()
+        return self._drain()
+
+
+# Sentence boundaries used to key the phoneme cache
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into whitespace-normalized sentences"""
+    sentences = []
+    for sentence in SENTENCE_SPLIT_RE.split(text):
+        sentence = WHITESPACE_RE.sub(" ", sentence).strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+class PhonemeCache:
+    """
+    Bounded LRU cache of sentence -> phoneme strings.
+    Every lookup moves the entry to the end of the LRU order, so get() takes
+    the same lock as put() and stats().
+    """
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            phonemes = self._entries.get(key)
+            if phonemes is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return phonemes
+
+    def put(self, key: Tuple[str, str], phonemes: Tuple[str, ...]):
+        with self._lock:
+            self._entries[key] = phonemes
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class SynthesisCancelled(Exception):
+    """Raised inside the synthesis thread when the caller cancelled the job"""
+    pass
+
+
+def configure_torch_threads(num_threads: Optional[int] = None, num_interop_threads: Optional[int] = None):
+    """
+    Set torch intra-op / inter-op thread counts (process wide).
+    With several executor threads synthesizing at once, capping intra-op threads
+    avoids oversubscribing the cores. Inter-op threads can only be set before any
+    parallel work has started; later attempts are ignored.
+    """
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            pass
+
 
 class KokoroTTS:
-    def __init__(self, language: str = "pt-BR", voice: str = None):
+    def __init__(
+        self,
+        language: str = "pt-BR",
+        voice: str = None,
+        quantize: bool = False,
+        num_threads: Optional[int] = None,
+        num_interop_threads: Optional[int] = None,
+        phoneme_cache_size: int = 2048,
+        normalize_text: bool = True,
+        audio_profile: str = "default",
+    ):
         """
         Initialize Kokoro TTS
 
         Args:
             language: Language code ("pt-BR" for Portuguese Brazilian, "en" for English)
             voice: Optional voice name (e.g., "pf_dora", "af_heart")
+            quantize: Apply dynamic int8 quantization to the model's Linear layers (CPU)
+            num_threads: torch intra-op threads (None keeps the torch default)
+            num_interop_threads: torch inter-op threads (None keeps the torch default)
+            phoneme_cache_size: Sentences kept in the phonemization (G2P) cache
+            normalize_text: Strip markdown/emoji/stage directions and expand numbers
+                and abbreviations before synthesis (see app/speech_text.py)
+            audio_profile: Default post-processing profile (see app/audio_processing.py)
         """
         self.language = language
         self.lang_code = LANG_CODES.get(language, "p")
         self.voice = voice or DEFAULT_VOICES.get(self.lang_code, "pf_dora")
+        self.quantized = False
+        self.phoneme_cache = PhonemeCache(max_entries=phoneme_cache_size)
+        self.normalizer = SpeechNormalizer(language) if normalize_text else None
+        if audio_profile not in AUDIO_PROFILES:
+            raise ValueError(f"Unknown audio profile: {audio_profile}")
+        self.audio_profile = audio_profile
         
         try:
             from kokoro import KPipeline
+            configure_torch_threads(num_threads, num_interop_threads)
             self.pipeline = KPipeline(lang_code=self.lang_code)
         except ImportError:
             raise ImportError(
                 "Kokoro TTS not installed. Install with: pip install kokoro"
             )
 
-    def synthesize(self, text: str) -> Tuple[bytes, float]:
+        self._optimize_model(quantize)
+
+    def _optimize_model(self, quantize: bool):
+        """Run the model under torch.inference_mode and optionally quantize it to int8"""
+        import torch
+
+        model = getattr(self.pipeline, "model", None)
+        if model is None:
+            return
+        model.eval()
+
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.pipeline.model = model
+            self.quantized = True
+
+        # inference_mode is thread local, so it wraps each forward call rather than
+        # the pipeline generator (which may be resumed from different executor threads)
+        model.forward = torch.inference_mode()(model.forward)
+
+    def synthesize(
+        self,
+        text: str,
+        cancel_event: Optional[threading.Event] = None,
+        sample_rate: Optional[int] = None,
+        profile: Optional[str] = None,
+    ) -> Tuple[memoryview, float]:
         """
         Synthesize speech from text
 
         Args:
             text: Text to synthesize
+            cancel_event: Optional event; once set, synthesis stops at the next segment
+            sample_rate: Output rate cap (e.g. 12000 under load); the profile's rate applies if lower
+            profile: Post-processing profile name (defaults to the instance's audio_profile)
 
         Returns:
-            Tuple of (wav_bytes, duration_seconds)
+            Tuple of (wav_bytes as memoryview, duration_seconds)
         """
+        audio_profile = AUDIO_PROFILES.get(profile or self.audio_profile)
+        if audio_profile is None:
+            raise ValueError(f"Unknown audio profile: {profile}")
         try:
             # Collect all audio chunks from the generator
-            audio_chunks = []
-            for _, _, audio in self.pipeline(text, voice=self.voice):
-                audio_chunks.append(audio)
-            
-            # Concatenate all audio chunks
-            import numpy as np
-            full_audio = np.concatenate(audio_chunks) if audio_chunks else np.array([])
-            
-            # Calculate duration
-            duration = len(full_audio) / SAMPLE_RATE
-            
-            # Convert numpy array to WAV bytes
-            wav_bytes = self._numpy_to_wav(full_audio)
-            
+            spoken = self.prepare_text(text)
+            audio_chunks = list(self.iter_audio(spoken, cancel_event=cancel_event))
+
+            # Trim silence, cap pauses, even out loudness and resample per chunk
+            audio_chunks, rate = postprocess_chunks(audio_chunks, audio_profile, sample_rate)
+
+            # Write chunks straight into one preallocated WAV buffer
+            wav_bytes, num_frames = assemble_wav(audio_chunks, rate)
+            duration = num_frames / rate
+
+            if self.normalizer is not None:
+                saved = self.normalizer.record(text, spoken, duration)
+                # One line per synthesis, never sampled: this is the per-turn savings report
+                logger.info(
+                    "Speech normalization saved %d chars (estimated %.2fs of audio at the reply's speaking rate)",
+                    saved["chars_saved"], saved["est_seconds_saved"],
+                )
+
             return wav_bytes, duration
+        except SynthesisCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Error synthesizing speech: {str(e)}")
     
-    def _numpy_to_wav(self, audio: 'np.ndarray') -> bytes:
+    def prepare_text(self, text: str) -> str:
+        """Text as it should be spoken (normalized unless normalize_text was disabled)"""
+        return self.normalizer.normalize(text) if self.normalizer is not None else text
+
+    def iter_audio(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator:
+        """
+        Yield float audio chunks as each pipeline segment finishes
+
+        Text is processed sentence by sentence. Phonemes of previously seen
+        sentences come from the phoneme cache, so cache hits skip text
+        normalization and G2P and only run acoustic inference.
+
+        Raises:
+            SynthesisCancelled: if cancel_event is set before a segment starts
+        """
+        voice = voice or self.voice
+        for sentence in split_sentences(text):
+            if cancel_event is not None and cancel_event.is_set():
+                raise SynthesisCancelled()
+            key = (self.lang_code, sentence)
+            cached = self.phoneme_cache.get(key)
+            if cached is not None:
+                for phonemes in cached:
+                    for _, _, audio in self.pipeline.generate_from_tokens(phonemes, voice=voice):
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise SynthesisCancelled()
+                        if audio is not None:
+                            yield audio
+                continue
+
+            phoneme_chunks = []
+            for _, phonemes, audio in self.pipeline(sentence, voice=voice):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise SynthesisCancelled()
+                if phonemes:
+                    phoneme_chunks.append(phonemes)
+                if audio is not None:
+                    yield audio
+            self.phoneme_cache.put(key, tuple(phoneme_chunks))
+
+    def stats(self) -> dict:
+        """TTS runtime statistics"""
+        return {
+            "language": self.language,
+            "voice": self.voice,
+            "quantized": self.quantized,
+            "audio_profile": self.audio_profile,
+            "phoneme_cache": self.phoneme_cache.stats(),
+            "normalization": self.normalizer.stats() if self.normalizer is not None else None,
+        }
+
+    async def stream_async(self, text: str, voice: Optional[str] = None, format: str = "wav") -> AsyncIterator[bytes]:
+        """
+        Stream encoded audio progressively (non-blocking)
+
+        Each pipeline segment is synthesized in the thread pool and emitted as
+        soon as it is ready: a streaming WAV header followed by PCM frames, or
+        Ogg pages.
+
+        Args:
+            text: Text to synthesize
+            voice: Optional voice override
+            format: "wav" or "ogg"
+        """
+        import asyncio
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported audio format: {format}")
+
+        chunks = self.iter_audio(self.prepare_text(text), voice)
+        done = object()
+
+        if format == "ogg":
+            encoder = OggStreamEncoder()
+            encode = encoder.encode
+        else:
+            encoder = None
+            encode = float_to_pcm16
+            yield wav_header()
+
+        # to_thread runs on the default executor with a copy of the request's
+        # context, so log records from synthesis keep the session / persona ids
+        while True:
+            audio = await asyncio.to_thread(next, chunks, done)
+            if audio is done:
+                break
+            data = await asyncio.to_thread(encode, audio)
+            if data:
+                yield data
+
+        if encoder is not None:
+            tail = await asyncio.to_thread(encoder.close)
+            if tail:
+                yield tail
+
+    def _numpy_to_wav(self, audio: 'np.ndarray') -> memoryview:
         """Convert numpy audio array to WAV bytes"""
-        import numpy as np
-        
-        # Normalize to int16 range
-        audio_int16 = (audio * 32767).astype(np.int16)
-        
-        # Create WAV in memory
-        buffer = io.BytesIO()
-        with wave.open(buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(SAMPLE_RATE)
-            wav_file.writeframes(audio_int16.tobytes())
-        
-        return buffer.getvalue()
+        wav_bytes, _ = assemble_wav([audio])
+        return wav_bytes
 
-    def synthesize_to_base64(self, text: str) -> Tuple[str, float]:
+    def synthesize_to_base64(
+        self,
+        text: str,
+        cancel_event: Optional[threading.Event] = None,
+        sample_rate: Optional[int] = None,
+        profile: Optional[str] = None,
+    ) -> Tuple[str, float]:
         """
         Synthesize speech and return as base64 encoded string
 
         Returns:
             Tuple of (base64_audio_string, duration_seconds)
         """
-        audio_bytes, duration = self.synthesize(text)
+        audio_bytes, duration = self.synthesize(text, cancel_event, sample_rate, profile)
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
         return audio_base64, duration
 
-    async def synthesize_async(self, text: str) -> Tuple[bytes, float]:
+    async def synthesize_async(self, text: str, cancel_event: Optional[threading.Event] = None) -> Tuple[memoryview, float]:
         """
         Async wrapper for synthesize - runs in thread pool to avoid blocking event loop
+        (with the caller's context, so logs keep the request's session / persona ids)
         """
         import asyncio
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.synthesize, text)
+        return await asyncio.to_thread(self.synthesize, text, cancel_event)
 
-    async def synthesize_to_base64_async(self, text: str) -> Tuple[str, float]:
+    async def synthesize_to_base64_async(
+        self,
+        text: str,
+        cancel_event: Optional[threading.Event] = None,
+        sample_rate: Optional[int] = None,
+        profile: Optional[str] = None,
+    ) -> Tuple[str, float]:
         """
         Async version of synthesize_to_base64 - non-blocking
+        Synthesis and base64 encoding both run in the thread pool
+        (with the caller's context, so logs keep the request's session / persona ids)
         """
-        audio_bytes, duration = await self.synthesize_async(text)
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        return audio_base64, duration
+        import asyncio
+        return await asyncio.to_thread(self.synthesize_to_base64, text, cancel_event, sample_rate, profile)
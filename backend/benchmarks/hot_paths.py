@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the TTS and serialization hot paths
+
+Measures each stage of a chat turn on its own, across short, medium and long
+Portuguese replies and several persona-table sizes:
+
+    text.normalize     speech text normalization (markdown, numbers, abbreviations)
+    tts.synthesize     Kokoro synthesis to WAV (phoneme cache disabled)
+    audio.postprocess  silence trimming, pause capping and loudness ("default" profile)
+    audio.mobile       the same plus polyphase resampling to 16 kHz ("mobile" profile)
+    wav.assemble       float chunks -> WAV bytes (what _numpy_to_wav runs)
+    base64.encode      WAV bytes -> base64 string
+    stream.frames      AI SDK stream parts for a reply (text + audio + finish)
+    persona.*          PersonaService queries on a scratch database
+
+Every benchmark does warm-up runs first and reports min/median/mean/p95/stdev
+in milliseconds. Results can be saved as JSON and compared against a stored
+baseline; the exit status is 1 when a median regresses past the threshold.
+
+Usage (from backend/):
+    python -m benchmarks.hot_paths [--runs 20] [--warmup 3] [--skip-tts]
+        [--sizes 10 100 1000] [--output results.json]
+        [--baseline benchmarks/baseline.json] [--threshold 0.15]
+
+Store a new baseline (on the machine the comparisons will run on):
+    python -m benchmarks.hot_paths --output benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+from app.tts import SAMPLE_RATE, assemble_wav, split_sentences
+from app.stream_protocol import text_part, audio_part, finish_part
+from app.speech_text import normalize_for_speech
+from app.audio_processing import AUDIO_PROFILES, postprocess_chunks
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+TEXTS = {
+    "short": "Olá! Tudo bem?",
+    "medium": "Eu quero um aplicativo simples para compartilhar receitas com a minha família.",
+    "long": (
+        "Olha, eu não entendo muito dessas coisas de tecnologia. O que eu queria mesmo "
+        "era um lugar onde eu pudesse guardar as minhas receitas, colocar uma foto do "
+        "prato pronto e mostrar para os meus amigos, sem complicação nenhuma. Hoje eu "
+        "anoto tudo num caderno e às vezes perco as folhas. Seria ótimo se desse para "
+        "procurar uma receita pelo nome ou pelos ingredientes que eu tenho em casa. "
+        "Ah, e precisa funcionar no celular, porque eu quase não uso o computador."
+    ),
+}
+
+# Rough speaking rate used for synthetic audio when --skip-tts is given
+SECONDS_PER_CHAR = 0.065
+
+
+def summarize(times_ms: List[float]) -> dict:
+    ordered = sorted(times_ms)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 4),
+        "median_ms": round(statistics.median(ordered), 4),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p95_ms": round(ordered[p95_index], 4),
+        "stdev_ms": round(statistics.stdev(ordered), 4) if len(ordered) > 1 else 0.0,
+    }
+
+
+def measure(fn: Callable[[], object], runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return summarize(times)
+
+
+async def measure_async(fn: Callable[[], Awaitable[object]], runs: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return summarize(times)
+
+
+def synthetic_chunks(text: str, seed: int = 0) -> List[np.ndarray]:
+    """One float32 chunk per sentence, sized like Kokoro's output for that sentence"""
+    rng = np.random.default_rng(seed)
+    return [
+        (0.1 * rng.standard_normal(int(len(sentence) * SECONDS_PER_CHAR * SAMPLE_RATE))).astype(np.float32)
+        for sentence in split_sentences(text)
+    ]
+
+
+def bench_audio(tts, runs: int, tts_runs: int, warmup: int, results: dict):
+    for size, text in TEXTS.items():
+        results[f"text.normalize[{size}]"] = measure(lambda: normalize_for_speech(text), runs, warmup)
+        if tts is not None:
+            results[f"tts.synthesize[{size}]"] = measure(lambda: tts.synthesize(text), tts_runs, 1)
+            chunks = [np.asarray(chunk, dtype=np.float32) for chunk in tts.iter_audio(text)]
+        else:
+            chunks = synthetic_chunks(text)
+
+        wav_bytes, num_frames = assemble_wav(chunks)
+        duration = num_frames / SAMPLE_RATE
+        audio_base64 = base64.b64encode(wav_bytes).decode("utf-8")
+
+        results[f"audio.postprocess[{size}]"] = measure(
+            lambda: postprocess_chunks(chunks, AUDIO_PROFILES["default"]), runs, warmup
+        )
+        results[f"audio.mobile[{size}]"] = measure(
+            lambda: postprocess_chunks(chunks, AUDIO_PROFILES["mobile"]), runs, warmup
+        )
+        results[f"wav.assemble[{size}]"] = measure(lambda: assemble_wav(chunks), runs, warmup)
+        results[f"base64.encode[{size}]"] = measure(
+            lambda: base64.b64encode(wav_bytes).decode("utf-8"), runs, warmup
+        )
+        results[f"stream.frames[{size}]"] = measure(
+            lambda: "".join((text_part(text), audio_part(audio_base64, duration), finish_part("stop"))),
+            runs,
+            warmup,
+        )
+        print(f"  {size}: {len(text)} chars, {duration:.1f}s audio, {len(audio_base64) / 1024:.0f} KiB base64")
+
+
+def generated_personas(start: int, count: int) -> list:
+    from app.models import PersonaImport
+
+    topics = ["receitas", "academia", "biblioteca", "clínica", "mercado", "escola", "oficina", "viagens"]
+    return [
+        PersonaImport(
+            name=f"Cliente {i}",
+            description=f"Cliente que quer um sistema de {topics[i % len(topics)]} para o seu negócio",
+            system_prompt=(
+                f"Você é o cliente {i}, dono de um negócio de {topics[i % len(topics)]}. "
+                "Responda como um cliente leigo em tecnologia, em frases curtas. " * 4
+            ),
+            initial_message=f"Olá! Eu preciso de ajuda com o meu negócio de {topics[i % len(topics)]}.",
+            language="pt-BR",
+        )
+        for i in range(start, start + count)
+    ]
+
+
+async def bench_personas(sizes: List[int], runs: int, warmup: int, results: dict):
+    # Imported here so PERSONAS_DB_PATH (set in main) is read first
+    from app.database import init_db
+    from app.services.persona_service import PersonaService
+
+    await init_db()
+    count, _ = await PersonaService.get_list_version()
+    for size in sorted(sizes):
+        if size > count:
+            await PersonaService.bulk_import(generated_personas(count, size - count))
+            count = size
+        middle_id = max(1, count // 2)
+        results[f"persona.get_all[{size}]"] = await measure_async(
+            lambda: PersonaService.get_all(limit=50), runs, warmup
+        )
+        results[f"persona.get_all_unpaged[{size}]"] = await measure_async(
+            PersonaService.get_all, runs, warmup
+        )
+        results[f"persona.get_by_id[{size}]"] = await measure_async(
+            lambda: PersonaService.get_by_id(middle_id), runs, warmup
+        )
+        results[f"persona.search[{size}]"] = await measure_async(
+            lambda: PersonaService.search("receitas", limit=20), runs, warmup
+        )
+        results[f"persona.list_version[{size}]"] = await measure_async(
+            PersonaService.get_list_version, runs, warmup
+        )
+        print(f"  {count} personas")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print current vs baseline medians and return the regressed benchmark names"""
+    regressions = []
+    print(f"\n{'benchmark':<36} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<36} {'-':>11} {stats['median_ms']:>9.3f}ms {'new':>8}")
+            continue
+        change = stats["median_ms"] / reference["median_ms"] - 1 if reference["median_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<36} {reference['median_ms']:>9.3f}ms {stats['median_ms']:>9.3f}ms "
+            f"{change * 100:>+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TTS and serialization hot paths")
+    parser.add_argument("--language", default="pt-BR")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--tts-runs", type=int, default=3, help="Timed runs for tts.synthesize (slow)")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warm-up runs per benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Persona table sizes")
+    parser.add_argument("--skip-tts", action="store_true", help="Skip Kokoro (audio stages use synthetic audio)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed median slowdown (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    results: dict = {}
+
+    tts = None
+    if not args.skip_tts:
+        from app.tts import KokoroTTS
+
+        # No phoneme cache, so repeated runs measure the full G2P + model path
+        tts = KokoroTTS(language=args.language, phoneme_cache_size=0)
+        tts.synthesize(TEXTS["short"])  # load the voice
+
+    print("Audio stages:")
+    bench_audio(tts, args.runs, args.tts_runs, args.warmup, results)
+
+    print("Persona queries:")
+    with tempfile.TemporaryDirectory(prefix="bench-personas-") as tmp:
+        os.environ["PERSONAS_DB_PATH"] = str(Path(tmp) / "personas.db")
+        asyncio.run(bench_personas(args.sizes, args.runs, args.warmup, results))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "skip_tts": args.skip_tts,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline.exists() and args.baseline.resolve() != (args.output.resolve() if args.output else None):
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    else:
+        print(f"\n{'benchmark':<36} {'median':>11} {'p95':>11}")
+        for name, stats in results.items():
+            print(f"{name:<36} {stats['median_ms']:>9.3f}ms {stats['p95_ms']:>9.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark Kokoro TTS CPU performance modes
+
+Compares the fp32 baseline against dynamic int8 quantization and different
+thread counts. For each mode it reports the real-time factor (synthesis time /
+audio duration, lower is faster) and how far the audio drifts from the fp32
+baseline (SNR and log-spectral distance).
+
+Usage (from backend/):
+    python -m benchmarks.tts_cpu_mode [--threads 1 2 4] [--interop 1] [--runs 3]
+"""
+import argparse
+import time
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from app.tts import KokoroTTS, SAMPLE_RATE, configure_torch_threads
+
+TEXTS = [
+    "Olá! Tudo bem?",
+    "Eu quero um aplicativo simples para compartilhar receitas com a minha família.",
+    (
+        "Olha, eu não entendo muito dessas coisas de tecnologia. O que eu queria mesmo "
+        "era um lugar onde eu pudesse guardar as minhas receitas, colocar uma foto do "
+        "prato pronto e mostrar para os meus amigos, sem complicação nenhuma."
+    ),
+]
+
+
+def synthesize_raw(tts: KokoroTTS, text: str) -> np.ndarray:
+    """Synthesize text and return the float samples"""
+    chunks = [np.asarray(chunk, dtype=np.float32) for chunk in tts.iter_audio(text)]
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+def snr_db(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Signal-to-noise ratio of candidate against reference (aligned to the shorter one)"""
+    n = min(len(reference), len(candidate))
+    if n == 0:
+        return float("nan")
+    noise = reference[:n] - candidate[:n]
+    signal_power = float(np.sum(reference[:n] ** 2))
+    noise_power = float(np.sum(noise ** 2))
+    if noise_power == 0:
+        return float("inf")
+    return 10 * np.log10(signal_power / noise_power)
+
+
+def log_spectral_distance(reference: np.ndarray, candidate: np.ndarray, frame: int = 1024, hop: int = 256) -> float:
+    """Mean log-spectral distance in dB between two signals (aligned to the shorter one)"""
+    n = min(len(reference), len(candidate))
+    if n < frame:
+        return float("nan")
+    window = np.hanning(frame).astype(np.float32)
+    starts = np.arange(0, n - frame + 1, hop)
+    index = starts[:, None] + np.arange(frame)[None, :]
+    ref_spec = np.abs(np.fft.rfft(reference[index] * window, axis=1)) ** 2
+    cand_spec = np.abs(np.fft.rfft(candidate[index] * window, axis=1)) ** 2
+    eps = 1e-10
+    diff = 10 * np.log10(ref_spec + eps) - 10 * np.log10(cand_spec + eps)
+    return float(np.mean(np.sqrt(np.mean(diff ** 2, axis=1))))
+
+
+def run_mode(tts: KokoroTTS, runs: int, baseline: Optional[List[np.ndarray]]) -> dict:
+    """Time every text `runs` times (after a warm-up) and compare against the baseline"""
+    synthesize_raw(tts, TEXTS[0])  # warm-up
+
+    total_time = 0.0
+    total_audio = 0.0
+    outputs = []
+    for text in TEXTS:
+        audio = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            audio = synthesize_raw(tts, text)
+            total_time += time.perf_counter() - start
+            total_audio += len(audio) / SAMPLE_RATE
+        outputs.append(audio)
+
+    result = {"rtf": total_time / total_audio if total_audio else float("nan"), "outputs": outputs}
+    if baseline is not None:
+        result["snr_db"] = float(np.mean([snr_db(ref, out) for ref, out in zip(baseline, outputs)]))
+        result["lsd_db"] = float(np.mean([log_spectral_distance(ref, out) for ref, out in zip(baseline, outputs)]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Kokoro TTS CPU performance modes")
+    parser.add_argument("--language", default="pt-BR")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="Intra-op thread counts to try (0 = torch default)")
+    parser.add_argument("--interop", type=int, default=0, help="Inter-op thread count (0 = torch default)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per text")
+    args = parser.parse_args()
+
+    # Thread count 0 means torch's own default, restored after any explicit count
+    default_threads = torch.get_num_threads()
+    configure_torch_threads(None, args.interop or None)
+
+    # Without the phoneme cache every run includes G2P, as a first-time sentence
+    # does, and fp32 and int8 do the same work per run
+    fp32 = KokoroTTS(language=args.language, phoneme_cache_size=0)
+    int8 = KokoroTTS(language=args.language, quantize=True, phoneme_cache_size=0)
+
+    configure_torch_threads(args.threads[0] or default_threads)
+    baseline = run_mode(fp32, args.runs, None)["outputs"]
+
+    print(f"{'mode':<8} {'threads':>7} {'RTF':>8} {'SNR dB':>8} {'LSD dB':>8}")
+    for threads in args.threads:
+        configure_torch_threads(threads or default_threads)
+        for name, tts in (("fp32", fp32), ("int8", int8)):
+            result = run_mode(tts, args.runs, baseline)
+            print(
+                f"{name:<8} {threads or 'default':>7} {result['rtf']:>8.3f} "
+                f"{result['snr_db']:>8.1f} {result['lsd_db']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,209 @@
+"""
+Pre-fork launcher for the FastAPI app
+
+Loads and warms the Kokoro model and voice tensors once in the parent process,
+then forks worker processes that serve the app. Workers inherit the model
+weights copy-on-write instead of each importing torch and building its own
+KokoroTTS.
+
+Usage (from backend/, Linux/macOS only):
+    uv run python main.py --workers 4 --port 8000
+
+Session state (conversation history, in-flight turns, deferred audio, prefill)
+is kept in memory per process, so every request of a session must reach the
+same worker. Each worker therefore listens on its own port (--port, --port + 1,
+...) and a proxy in front routes on the x-session-id header; see the README.
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from app.logging_config import setup_logging
+
+setup_logging()
+logger = logging.getLogger("launcher")
+
+
+def read_memory(pid: int) -> dict:
+    """
+    Read RSS and PSS (MB) for a process from /proc.
+    PSS splits shared pages between the processes sharing them, so the sum of
+    worker PSS shows the real footprint while RSS counts shared weights in full.
+    """
+    memory = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                    memory[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return {
+        "rss_mb": memory.get("Rss"),
+        "pss_mb": memory.get("Pss"),
+        "shared_mb": (memory["Shared_Clean"] + memory["Shared_Dirty"]) if "Shared_Clean" in memory else None,
+    }
+
+
+def format_mb(value) -> str:
+    return f"{value:.0f} MB" if value is not None else "n/a"
+
+
+def report_memory(parent_pid: int, worker_pids: list[int]):
+    """Log per-process memory so copy-on-write sharing can be confirmed"""
+    parent = read_memory(parent_pid)
+    logger.info("parent  pid=%d rss=%s pss=%s", parent_pid, format_mb(parent["rss_mb"]), format_mb(parent["pss_mb"]))
+    total_rss = 0.0
+    total_pss = 0.0
+    for pid in worker_pids:
+        memory = read_memory(pid)
+        total_rss += memory["rss_mb"] or 0
+        total_pss += memory["pss_mb"] or 0
+        logger.info(
+            "worker  pid=%d rss=%s pss=%s shared=%s",
+            pid, format_mb(memory["rss_mb"]), format_mb(memory["pss_mb"]), format_mb(memory["shared_mb"]),
+        )
+    logger.info("workers total rss=%.0f MB pss=%.0f MB", total_rss, total_pss)
+
+
+def load_app(warmup: bool):
+    """Import the app (builds KokoroTTS), initialize the database and warm the model"""
+    from app.main import app, tts_client
+    from app.database import init_db
+
+    # Run once here so workers don't race on table creation / seeding
+    asyncio.run(init_db())
+
+    if warmup:
+        start = time.perf_counter()
+        tts_client.pipeline.load_voice(tts_client.voice)
+        tts_client.synthesize("Olá.")
+        logger.info("Kokoro model warmed up in %.1fs", time.perf_counter() - start)
+
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers don't write to (and un-share) pages holding these objects
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def run_worker(app, sock: socket.socket, log_level: str, num_threads: int):
+    """Child process entry point: serve the app on the inherited socket"""
+    import uvicorn
+    from app.tts import configure_torch_threads
+
+    # The parent warmed up single-threaded so no torch thread pool existed at
+    # fork time; each worker now starts its own pool with its share of the cores
+    configure_torch_threads(num_threads)
+
+    # log_config=None keeps uvicorn from installing its own handlers, so its
+    # loggers stay on the queue handler set up by setup_logging
+    config = uvicorn.Config(app, log_level=log_level, log_config=None)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, log_level: str, num_threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            run_worker(app, sock, log_level, num_threads)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def listen(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
 def main():
-    print("Hello from backend!")
+    parser = argparse.ArgumentParser(description="Run the backend with pre-forked workers sharing the TTS model")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the first worker (worker i uses port + i)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up synthesis in the parent")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        logger.error("Pre-fork mode needs os.fork (Linux/macOS). Use uvicorn directly instead.")
+        sys.exit(1)
+
+    # One listening socket per worker, so a proxy can pin each session to one process
+    sockets = [listen(args.host, args.port + index) for index in range(args.workers)]
+
+    # Split the cores between the workers unless TTS_NUM_THREADS says otherwise;
+    # each worker keeping torch's default (all cores) would oversubscribe them N times
+    num_threads = int(os.getenv("TTS_NUM_THREADS", "0")) or max(1, (os.cpu_count() or 1) // args.workers)
+    # Load and warm up single-threaded (read by app.main at import); workers set num_threads after fork
+    os.environ["TTS_NUM_THREADS"] = "1"
+    app = load_app(warmup=not args.no_warmup)
+
+    # pid -> (worker index, start time)
+    workers = {}
+    for index, sock in enumerate(sockets):
+        workers[spawn_worker(app, sock, args.log_level, num_threads)] = (index, time.monotonic())
+    logger.info(
+        "Started %d workers on http://%s:%d-%d (%d torch threads each)",
+        len(workers), args.host, args.port, args.port + args.workers - 1, num_threads,
+    )
+
+    shutting_down = False
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    # Give workers time to finish their own startup before measuring
+    time.sleep(5)
+    if not shutting_down:
+        report_memory(os.getpid(), sorted(workers))
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker = workers.pop(pid, None)
+        if shutting_down or worker is None:
+            continue
+        index, started = worker
+        if time.monotonic() - started < 10:
+            # Failing right after startup (e.g. Ollama missing): don't restart in a loop
+            logger.error("Worker %d exited during startup with status %d, shutting down", pid, status)
+            shutdown(signal.SIGTERM, None)
+            continue
+        # The replacement takes over the same port; the sessions it served start over
+        logger.warning("Worker %d (port %d) exited with status %d, restarting", pid, args.port + index, status)
+        workers[spawn_worker(app, sockets[index], args.log_level, num_threads)] = (index, time.monotonic())
+
+    for sock in sockets:
+        sock.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Mock LLM server for local testing
+
+Serves both LLM backends the app supports, with canned replies and no model:
+    - Ollama:            GET /api/tags, POST /api/chat
+    - OpenAI-compatible: GET /v1/models, POST /v1/chat/completions (SSE streaming or not)
+
+Usage:
+    python mock_llm_server.py [--port 11434] [--model gemma3:1b] [--delay 0.02]
+
+Then start the backend against it, e.g.:
+    LLM_BACKEND=openai LLM_BASE_URL=http://localhost:11434 uv run uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+MODEL = "gemma3:1b"
+# Seconds to wait between streamed tokens (simulates generation speed)
+TOKEN_DELAY = 0.02
+
+app = FastAPI(title="Mock LLM server")
+
+
+def reply_for(messages: list[dict], options: dict) -> str:
+    """Deterministic reply echoing the last user message, so tests can assert on it"""
+    user_message = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    has_system = any(m.get("role") == "system" for m in messages)
+    reply = f"Mock reply to: {user_message} (turn {sum(m.get('role') == 'user' for m in messages)}, system prompt: {'yes' if has_system else 'no'})"
+    max_tokens = options.get("max_tokens") or options.get("num_predict")
+    if max_tokens:
+        reply = " ".join(reply.split()[:max_tokens])
+    return reply
+
+
+def tokens(text: str) -> list[str]:
+    words = text.split(" ")
+    return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+
+@app.get("/api/tags")
+async def ollama_tags():
+    return {"models": [{"name": MODEL}]}
+
+
+@app.post("/api/chat")
+async def ollama_chat(request: Request):
+    body = await request.json()
+    text = reply_for(body.get("messages", []), body.get("options") or {})
+    await asyncio.sleep(TOKEN_DELAY * len(tokens(text)))
+    return {
+        "model": body.get("model", MODEL),
+        "message": {"role": "assistant", "content": text},
+        "done": True,
+    }
+
+
+@app.get("/v1/models")
+async def openai_models():
+    return {"object": "list", "data": [{"id": MODEL, "object": "model", "owned_by": "mock"}]}
+
+
+@app.post("/v1/chat/completions")
+async def openai_chat_completions(request: Request):
+    body = await request.json()
+    text = reply_for(body.get("messages", []), body)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    model = body.get("model", MODEL)
+
+    if not body.get("stream"):
+        await asyncio.sleep(TOKEN_DELAY * len(tokens(text)))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        }
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    async def generate():
+        yield chunk({"role": "assistant"})
+        for token in tokens(text):
+            await asyncio.sleep(TOKEN_DELAY)
+            yield chunk({"content": token})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+def main():
+    global MODEL, TOKEN_DELAY
+
+    parser = argparse.ArgumentParser(description="Mock Ollama / OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11434, help="Port to bind (default: 11434)")
+    parser.add_argument("--model", default=MODEL, help=f"Model name to advertise (default: {MODEL})")
+    parser.add_argument("--delay", type=float, default=TOKEN_DELAY, help=f"Seconds per generated token (default: {TOKEN_DELAY})")
+    args = parser.parse_args()
+
+    MODEL = args.model
+    TOKEN_DELAY = args.delay
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
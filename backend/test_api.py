@@ -4,15 +4,27 @@ Simple API Test Script for TCC Interview Simulator Backend
 
 Usage:
     python test_api.py [--base-url URL]
+    python test_api.py --mock-llm [--backends ollama openai]
 
-By default, connects to http://localhost:8000
+By default, connects to http://localhost:8000. With --mock-llm it instead
+starts mock_llm_server.py and the app itself once per LLM backend and runs a
+chat smoke test against each (Kokoro must be installed; no model is needed).
 """
 
 import requests
 import argparse
+import json
+import os
+import socket
+import subprocess
 import sys
+import tempfile
+import time
+from pathlib import Path
 from typing import Optional
 
+BACKEND_DIR = Path(__file__).resolve().parent
+
 # ANSI color codes for pretty output
 class Colors:
     GREEN = '\033[92m'
@@ -48,34 +60,20 @@ class APITester:
         self.tests_passed = 0
         self.tests_failed = 0
 
-    def test_endpoint(self, method: str, endpoint: str, 
-                       expected_status: int = 200,
-                       json_data: Optional[dict] = None,
-                       headers: Optional[dict] = None,
-                       description: str = "") -> Optional[dict]:
-        """Test a single endpoint and return response data if successful"""
+    def test_request(self, method: str, endpoint: str,
+                     expected_status: int = 200,
+                     description: str = "",
+                     **kwargs) -> Optional[requests.Response]:
+        """Send a request, count it as passed if the status matches and return the response"""
         url = f"{self.base_url}{endpoint}"
         
         try:
-            if method.upper() == "GET":
-                response = self.session.get(url, headers=headers, timeout=30)
-            elif method.upper() == "POST":
-                response = self.session.post(url, json=json_data, headers=headers, timeout=30)
-            elif method.upper() == "PUT":
-                response = self.session.put(url, json=json_data, headers=headers, timeout=30)
-            elif method.upper() == "DELETE":
-                response = self.session.delete(url, headers=headers, timeout=30)
-            else:
-                print_error(f"Unknown method: {method}")
-                return None
+            response = self.session.request(method.upper(), url, timeout=30, **kwargs)
 
             if response.status_code == expected_status:
                 print_success(f"{method} {endpoint} - {description}")
                 self.tests_passed += 1
-                try:
-                    return response.json() if response.text else {}
-                except:
-                    return {"raw": response.text}
+                return response
             else:
                 print_error(f"{method} {endpoint} - Expected {expected_status}, got {response.status_code}")
                 print_info(f"Response: {response.text[:200]}")
@@ -95,6 +93,38 @@ class APITester:
             self.tests_failed += 1
             return None
 
+    def test_endpoint(self, method: str, endpoint: str, 
+                       expected_status: int = 200,
+                       json_data: Optional[dict] = None,
+                       headers: Optional[dict] = None,
+                       description: str = "") -> Optional[dict]:
+        """Test a single endpoint and return response data if successful"""
+        response = self.test_request(
+            method, endpoint, expected_status, description, json=json_data, headers=headers
+        )
+        if response is None:
+            return None
+        try:
+            return response.json() if response.text else {}
+        except ValueError:
+            return {"raw": response.text}
+
+    def check(self, condition: bool, description: str, detail: str = "") -> bool:
+        """Count an assertion about a response that already came back"""
+        if condition:
+            print_success(description)
+            self.tests_passed += 1
+        else:
+            print_error(description)
+            if detail:
+                print_info(detail)
+            self.tests_failed += 1
+        return condition
+
+    @staticmethod
+    def ndjson_rows(response: requests.Response) -> list:
+        return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
     def run_all_tests(self):
         """Run all API tests"""
         
@@ -104,18 +134,49 @@ class APITester:
         
         self.test_endpoint("GET", "/", description="Root endpoint")
         self.test_endpoint("GET", "/health", description="Health check")
+        self.test_endpoint("GET", "/ready", description="Readiness check (LLM server and TTS up)")
         
         # ==========================================
         print_header("2. Personas CRUD API")
         # ==========================================
         
         # List all personas
-        personas_response = self.test_endpoint("GET", "/api/personas/", description="List all personas")
+        list_response = self.test_request("GET", "/api/personas/", description="List all personas")
+        if list_response is not None:
+            personas_list = list_response.json()
+            summary_fields = {"id", "name", "description", "language", "created_at"}
+            self.check(
+                all(set(p) == summary_fields for p in personas_list),
+                "List returns summaries only (no system prompt or greeting)",
+                f"Fields: {sorted(set().union(*personas_list)) if personas_list else []}"
+            )
+            total = list_response.headers.get("X-Total-Count")
+            self.check(total == str(len(personas_list)), "X-Total-Count matches the full listing", f"X-Total-Count: {total}")
+
+            # Conditional GET
+            etag = list_response.headers.get("ETag")
+            if self.check(bool(etag), "List response carries an ETag"):
+                self.test_request(
+                    "GET", "/api/personas/",
+                    expected_status=304,
+                    headers={"If-None-Match": etag},
+                    description="Unchanged list with If-None-Match (expect 304)"
+                )
+
+            # Pagination
+            page = self.test_request(
+                "GET", "/api/personas/",
+                params={"limit": 1, "offset": 0},
+                description="List first page (limit=1)"
+            )
+            if page is not None:
+                self.check(len(page.json()) == min(1, len(personas_list)), "Page holds at most limit personas")
+                self.check(page.headers.get("X-Total-Count") == total, "Paged X-Total-Count is the full count")
         
         # Create a new test persona
         test_persona = {
             "name": "Test Persona",
-            "description": "A test persona for API testing",
+            "description": "A test persona for API testing (apitestmarker)",
             "system_prompt": "You are a helpful test assistant.",
             "initial_message": "Olá! Sou uma persona de teste."
         }
@@ -144,6 +205,21 @@ class APITester:
                 description=f"Update persona {persona_id}"
             )
             
+            # Full-text search finds it by its description
+            search_response = self.test_request(
+                "GET", "/api/personas/search",
+                params={"q": "apitestmarker"},
+                description="Search personas"
+            )
+            if search_response is not None:
+                results = search_response.json()
+                self.check(
+                    any(r["id"] == persona_id and "snippet" in r and "rank" in r for r in results),
+                    "Search returns the test persona with snippet and rank",
+                    f"Results: {results}"
+                )
+                self.check("X-Total-Count" in search_response.headers, "Search response carries X-Total-Count")
+            
             # Delete the test persona
             self.test_endpoint(
                 "DELETE", f"/api/personas/{persona_id}",
@@ -159,7 +235,48 @@ class APITester:
         )
         
         # ==========================================
-        print_header("3. Initial Message API")
+        print_header("3. Persona Import / Export (NDJSON)")
+        # ==========================================
+        
+        export_response = self.test_request("GET", "/api/personas/export", description="Export personas as NDJSON")
+        if export_response is not None:
+            self.check(
+                export_response.headers.get("content-type", "").startswith("application/x-ndjson"),
+                "Export is served as application/x-ndjson"
+            )
+            try:
+                exported = self.ndjson_rows(export_response)
+                self.check(all("system_prompt" in row for row in exported), "Every exported line is a full persona")
+            except ValueError as e:
+                self.check(False, "Every exported line is valid JSON", str(e))
+        
+        import_body = "\n".join([
+            json.dumps({**test_persona, "name": "Imported Test Persona"}),
+            json.dumps({"name": "Invalid row"}),
+        ])
+        import_response = self.test_request(
+            "POST", "/api/personas/import",
+            data=import_body.encode("utf-8"),
+            headers={"Content-Type": "application/x-ndjson"},
+            description="Import one valid and one invalid NDJSON row"
+        )
+        if import_response is not None:
+            summary = import_response.json()
+            self.check(
+                summary.get("created") == 1 and summary.get("failed") == 1,
+                "Import creates the valid row and reports the invalid one",
+                f"Summary: {summary}"
+            )
+            for row in summary.get("results", []):
+                if row.get("status") == "created":
+                    self.test_endpoint(
+                        "DELETE", f"/api/personas/{row['id']}",
+                        expected_status=204,
+                        description=f"Delete imported persona {row['id']}"
+                    )
+        
+        # ==========================================
+        print_header("4. Initial Message API")
         # ==========================================
         
         initial_response = self.test_endpoint(
@@ -172,7 +289,26 @@ class APITester:
             print_info(f"Duration: {initial_response.get('duration', 0)} seconds")
         
         # ==========================================
-        print_header("4. Chat API (Simple)")
+        print_header("5. Streaming TTS API")
+        # ==========================================
+        
+        tts_response = self.test_request(
+            "POST", "/api/tts",
+            json={"text": "Olá! Este é um teste de voz."},
+            description="Stream WAV audio"
+        )
+        if tts_response is not None:
+            self.check(tts_response.content[:4] == b"RIFF", "TTS stream starts with a WAV header")
+            self.check(len(tts_response.content) > 44, "TTS stream carries audio after the header")
+        self.test_request(
+            "POST", "/api/tts",
+            json={"text": "Olá", "voice": "../../etc/passwd"},
+            expected_status=422,
+            description="Reject unknown voice (expect 422)"
+        )
+        
+        # ==========================================
+        print_header("6. Chat API (Simple)")
         # ==========================================
         
         chat_message = {
@@ -190,10 +326,34 @@ class APITester:
             print_info(f"Chat response: {chat_response.get('text', '')[:150]}...")
             print_info(f"Has audio: {'audio' in chat_response and chat_response['audio'] is not None}")
         
+        # User and assistant turns are both in the transcript export
+        transcript_response = self.test_request(
+            "GET", "/api/transcripts/export",
+            params={"session_id": "test-session"},
+            description="Export session transcript as NDJSON"
+        )
+        if transcript_response is not None and chat_response:
+            try:
+                roles = {row["role"] for row in self.ndjson_rows(transcript_response)}
+                self.check({"user", "assistant"} <= roles, "Transcript has the user and assistant turns", f"Roles: {roles}")
+            except ValueError as e:
+                self.check(False, "Every transcript line is valid JSON", str(e))
+        
         # ==========================================
-        print_header("5. Session Management")
+        print_header("7. Session Management")
         # ==========================================
         
+        interrupt_response = self.test_endpoint(
+            "POST", "/api/session/test-session/interrupt",
+            description="Interrupt test session"
+        )
+        if interrupt_response:
+            self.check(
+                interrupt_response.get("interrupted") is False,
+                "Nothing to interrupt once the turn has finished",
+                f"Response: {interrupt_response}"
+            )
+        
         self.test_endpoint(
             "DELETE", "/api/session/test-session",
             description="Clear test session"
@@ -216,6 +376,105 @@ class APITester:
             return 1
 
 
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(url: str, timeout: float, process: subprocess.Popen) -> bool:
+    """Poll url until it answers; False on timeout or if the process exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            requests.get(url, timeout=2)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    return False
+
+
+def stop_process(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def smoke_test_backend(backend: str, db_path: Path) -> tuple[int, int]:
+    """Start the mock LLM server and the app with LLM_BACKEND=backend, run one chat; returns (passed, failed)"""
+    print_header(f"Mock LLM smoke test: LLM_BACKEND={backend}")
+    llm_port, api_port = free_port(), free_port()
+    base_url = f"http://127.0.0.1:{api_port}"
+
+    mock = subprocess.Popen(
+        [sys.executable, "mock_llm_server.py", "--port", str(llm_port), "--delay", "0"],
+        cwd=BACKEND_DIR,
+    )
+    env = {
+        **os.environ,
+        "LLM_BACKEND": backend,
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}",
+        "LLM_MODEL": "gemma3:1b",
+        "PERSONAS_DB_PATH": str(db_path),
+    }
+    api = None
+    tester = APITester(base_url=base_url)
+    try:
+        if not wait_for_server(f"http://127.0.0.1:{llm_port}/", 30, mock):
+            print_error("Mock LLM server did not start")
+            return 0, 1
+        api = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port)],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        # Loading Kokoro takes a while on the first start
+        if not wait_for_server(f"{base_url}/health", 180, api):
+            print_error("Backend did not start (see its log above)")
+            return 0, 1
+
+        session = {"x-session-id": f"smoke-{backend}"}
+        for turn in ("Olá, tudo bem?", "Pode repetir?"):
+            data = tester.test_endpoint(
+                "POST", "/api/chat/simple",
+                json_data={"messages": [{"role": "user", "content": turn}]},
+                headers=session,
+                description=f"Simple chat via {backend}: {turn}"
+            )
+            if data is not None:
+                tester.check(
+                    (data.get("text") or "").startswith("Mock reply"),
+                    "Reply came from the mock server",
+                    f"Unexpected reply: {data}"
+                )
+
+        tester.test_endpoint("DELETE", f"/api/session/smoke-{backend}", description="Clear smoke session")
+        return tester.tests_passed, tester.tests_failed
+    finally:
+        if api is not None:
+            stop_process(api)
+        stop_process(mock)
+
+
+def run_mock_llm_smoke(backends: list[str]) -> int:
+    passed = failed = 0
+    with tempfile.TemporaryDirectory(prefix="smoke-personas-") as tmp:
+        for backend in backends:
+            backend_passed, backend_failed = smoke_test_backend(backend, Path(tmp) / f"{backend}.db")
+            passed += backend_passed
+            failed += backend_failed
+
+    print_header("Smoke Test Summary")
+    print(f"{Colors.GREEN}Passed: {passed}{Colors.END}")
+    print(f"{Colors.RED}Failed: {failed}{Colors.END}")
+    return 0 if failed == 0 else 1
+
+
 def main():
     parser = argparse.ArgumentParser(description="Test the TCC Interview Simulator Backend API")
     parser.add_argument(
@@ -223,8 +482,23 @@ def main():
         default="http://localhost:8000",
         help="Base URL of the API (default: http://localhost:8000)"
     )
+    parser.add_argument(
+        "--mock-llm",
+        action="store_true",
+        help="Start mock_llm_server.py and the app per LLM backend and smoke test /api/chat/simple"
+    )
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=["ollama", "openai"],
+        help="LLM backends for --mock-llm (default: ollama openai)"
+    )
     args = parser.parse_args()
-    
+
+    if args.mock_llm:
+        print(f"\n{Colors.BOLD}TCC Interview Simulator - Mock LLM Smoke Test{Colors.END}")
+        sys.exit(run_mock_llm_smoke(args.backends))
+
     print(f"\n{Colors.BOLD}TCC Interview Simulator - API Test Script{Colors.END}")
     print(f"Testing API at: {args.base_url}")
     
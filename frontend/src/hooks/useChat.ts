@@ -1,6 +1,9 @@
 import { useState, useEffect, useCallback, useRef } from "react"
 import { useInitialMessage, useChatMutation } from "../lib/queries/chat"
-import { clearSession } from "../lib/api"
+import { clearSession, getDeferredAudio, sendTypingSignal } from "../lib/api"
+
+// Pause in typing before the draft is sent as a typing signal
+const TYPING_SIGNAL_DELAY_MS = 300
 
 interface Message {
   id: string
@@ -75,6 +78,16 @@ export function useChat(personaId?: number): UseChatReturn {
     }
   }, [personaId])
 
+  useEffect(() => {
+    if (!input.trim()) return
+    const timeoutId = setTimeout(() => {
+      sendTypingSignal(input, sessionId.current, personaId).catch(() => {
+        // Only an optimization; the message still goes through without it
+      })
+    }, TYPING_SIGNAL_DELAY_MS)
+    return () => clearTimeout(timeoutId)
+  }, [input, personaId])
+
   const handleSubmit = useCallback(
     async (e?: React.FormEvent) => {
       e?.preventDefault()
@@ -113,6 +126,17 @@ export function useChat(personaId?: number): UseChatReturn {
             duration: data.duration || 0,
           })
           setCurrentText(data.text)
+        } else if (data.audio_id) {
+          // Server is under load and sent the text first; play the audio once it is ready
+          const requestSessionId = sessionId.current
+          const deferred = await getDeferredAudio(data.audio_id, requestSessionId)
+          if (deferred.audio && sessionId.current === requestSessionId) {
+            setCurrentAudio({
+              audio: deferred.audio,
+              duration: deferred.duration || 0,
+            })
+            setCurrentText(data.text)
+          }
         }
       } catch (err) {
         console.error("Error sending message:", err)
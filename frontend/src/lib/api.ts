@@ -3,7 +3,15 @@
  */
 const API_BASE = "http://localhost:8000"
 
-export interface Persona {
+export interface InferenceSettings {
+  model?: string | null
+  num_predict?: number | null
+  num_ctx?: number | null
+  temperature?: number | null
+  stop?: string[] | null
+}
+
+export interface Persona extends InferenceSettings {
   id: number
   name: string
   description?: string
@@ -14,7 +22,9 @@ export interface Persona {
   updated_at: string
 }
 
-export interface PersonaCreate {
+export type PersonaSummary = Pick<Persona, "id" | "name" | "description" | "language" | "created_at">
+
+export interface PersonaCreate extends InferenceSettings {
   name: string
   description?: string
   system_prompt: string
@@ -22,7 +32,7 @@ export interface PersonaCreate {
   language: "pt-BR" | "en"
 }
 
-export interface PersonaUpdate {
+export interface PersonaUpdate extends InferenceSettings {
   name?: string
   description?: string
   system_prompt?: string
@@ -30,7 +40,7 @@ export interface PersonaUpdate {
   language?: "pt-BR" | "en"
 }
 
-export async function getPersonas(): Promise<Persona[]> {
+export async function getPersonas(): Promise<PersonaSummary[]> {
   const response = await fetch(`${API_BASE}/api/personas`)
   if (!response.ok) {
     throw new Error(`Erro ao carregar personas: ${response.statusText}`)
@@ -116,11 +126,22 @@ export interface ChatRequest {
   persona_id?: number
 }
 
+export type LoadMode = "full" | "low_sample_rate" | "short_replies" | "text_first" | "text_only"
+
 export interface ChatResponse {
   text: string
-  audio?: string
+  audio?: string | null
   duration?: number
   error?: string
+  // Server load-shedding mode for this turn; in "text_first" the audio comes later via audio_id
+  load_mode?: LoadMode
+  audio_id?: string
+}
+
+export interface DeferredAudioResponse {
+  audio: string | null
+  duration: number
+  error?: string
 }
 
 export async function sendChatMessage(
@@ -150,9 +171,42 @@ export async function sendChatMessage(
   return data
 }
 
+export async function sendTypingSignal(
+  text: string,
+  sessionId: string,
+  personaId?: number
+): Promise<void> {
+  // Best effort: lets the server warm the LLM prompt cache before the message is sent
+  await fetch(`${API_BASE}/api/chat/typing`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "x-session-id": sessionId,
+    },
+    body: JSON.stringify({ text, persona_id: personaId }),
+  })
+}
+
+export async function getDeferredAudio(audioId: string, sessionId: string): Promise<DeferredAudioResponse> {
+  // The server long-polls; 202 means synthesis is still running, so ask again.
+  // x-session-id lets a proxy route the poll to the worker holding the job
+  for (;;) {
+    const response = await fetch(`${API_BASE}/api/audio/${audioId}`, {
+      headers: { "x-session-id": sessionId },
+    })
+    if (response.status === 202) continue
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: response.statusText }))
+      throw new Error(error.detail || `Erro ao carregar áudio: ${response.statusText}`)
+    }
+    return response.json()
+  }
+}
+
 export async function clearSession(sessionId: string): Promise<void> {
   const response = await fetch(`${API_BASE}/api/session/${sessionId}`, {
     method: "DELETE",
+    headers: { "x-session-id": sessionId },
   })
   if (!response.ok) {
     const error = await response.json().catch(() => ({ detail: response.statusText }))
@@ -165,7 +219,8 @@ export async function checkServerHealth(): Promise<boolean> {
     const controller = new AbortController()
     const timeoutId = setTimeout(() => controller.abort(), 5000)
 
-    const response = await fetch(`${API_BASE}/health`, {
+    // /ready is 503 when Ollama or TTS is down, not only when the server is unreachable
+    const response = await fetch(`${API_BASE}/ready`, {
       method: "GET",
       signal: controller.signal,
     })
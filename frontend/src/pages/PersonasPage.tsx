@@ -21,7 +21,7 @@ import {
   SelectValue,
 } from "@/components/ui/select"
 import { Plus, Edit, Trash2, ArrowLeft, Loader2 } from "lucide-react"
-import { type PersonaCreate, type Persona } from "@/lib/api"
+import { getPersona, type PersonaCreate, type PersonaSummary } from "@/lib/api"
 import {
   usePersonas,
   useCreatePersona,
@@ -37,7 +37,7 @@ export function PersonasPage() {
   const deleteMutation = useDeletePersona()
 
   const [isDialogOpen, setIsDialogOpen] = useState(false)
-  const [editingPersona, setEditingPersona] = useState<Persona | null>(null)
+  const [editingPersona, setEditingPersona] = useState<PersonaSummary | null>(null)
   const [formData, setFormData] = useState<PersonaCreate>({
     name: "",
     description: "",
@@ -62,17 +62,23 @@ export function PersonasPage() {
     setIsDialogOpen(true)
   }
 
-  const handleOpenEdit = (persona: Persona) => {
-    setEditingPersona(persona)
-    setFormData({
-      name: persona.name,
-      description: persona.description || "",
-      system_prompt: persona.system_prompt,
-      initial_message: persona.initial_message,
-      language: persona.language,
-    })
-    setError(null)
-    setIsDialogOpen(true)
+  const handleOpenEdit = async (summary: PersonaSummary) => {
+    // The list only carries summaries; load the full persona (system prompt) for editing
+    try {
+      const persona = await getPersona(summary.id)
+      setEditingPersona(summary)
+      setFormData({
+        name: persona.name,
+        description: persona.description || "",
+        system_prompt: persona.system_prompt,
+        initial_message: persona.initial_message,
+        language: persona.language,
+      })
+      setError(null)
+      setIsDialogOpen(true)
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Falha ao carregar persona")
+    }
   }
 
   const handleSubmit = async () => {